@@ -7,6 +7,9 @@ import joblib
 import numpy as np
 import streamlit as st
 
+from src.coach.grilla import GrillaRiesgo
+from src.extractor.extractor_perfil import extract_profile_from_text
+
 # =========================
 # CONFIGURACIÓN GENERAL
 # =========================
@@ -28,8 +31,28 @@ st.warning(
 # =========================
 MODEL_PATH = os.path.join("modelo-regresion/modelo_riesgo_desercion.pkl")
 
-try:
+# Grilla precalculada opcional (python -m src.coach.grilla <modelo.pkl> <grilla.npy> --demo)
+GRILLA_PATH = "modelo-regresion/modelo_riesgo_desercion_grilla.npy"
+
+
+@st.cache_resource(show_spinner=False)
+def cargar_modelo():
+    """
+    Modelo y grilla se cargan una sola vez por proceso (Streamlit re-ejecuta el script
+    en cada interacción; sin esto se volvía a leer el .pkl en cada rerun).
+    """
     modelo = joblib.load(MODEL_PATH)
+    grilla = None
+    if os.path.exists(GRILLA_PATH):
+        try:
+            grilla = GrillaRiesgo.cargar(GRILLA_PATH, modelo_path=MODEL_PATH)
+        except Exception:
+            grilla = None
+    return modelo, grilla
+
+
+try:
+    modelo, grilla = cargar_modelo()
 except Exception as e:
     st.error(
         "❌ No se pudo cargar el modelo entrenado.\n\n"
@@ -65,6 +88,9 @@ def init_state():
         st.session_state.plan_text = ""
     if "share_token" not in st.session_state:
         st.session_state.share_token = None
+    if "planes" not in st.session_state:
+        # plan generado por perfil+score en esta sesión
+        st.session_state.planes: Dict[str, str] = {}
 
 init_state()
 
@@ -83,70 +109,6 @@ def render_chat():
         with st.chat_message(m["role"]):
             st.markdown(m["content"])
 
-# =========================
-# EXTRACCIÓN NL → JSON (HEURÍSTICA)
-# =========================
-def extract_profile_from_text(text: str) -> Dict[str, Any]:
-    """
-    Heurística simple: busca patrones de edad, sexo, promedio (1-7), asistencia (%)
-    y asignatura 'que me cuesta' en lenguaje natural.
-    Si no encuentra, deja campos como None.
-    """
-    import re
-
-    t = text.lower()
-
-    # Edad
-    edad = None
-    m_edad = re.search(r"(\d{1,2})\s*(años|anios|edad)", t) or re.search(
-        r"edad\s*[:=]?\s*(\d{1,2})", t
-    )
-    if m_edad:
-        for g in m_edad.groups():
-            if g and g.isdigit():
-                edad = int(g)
-                break
-
-    # Sexo
-    sexo = None
-    if any(w in t for w in ["masculino", "hombre", "varón", "varon"]):
-        sexo = "Masculino"
-    elif any(w in t for w in ["femenino", "mujer"]):
-        sexo = "Femenino"
-    elif any(w in t for w in ["no binario", "nobinario", "nb"]):
-        sexo = "No binario"
-
-    # Promedio (1.0 a 7.0)
-    promedio = None
-    m_prom = re.search(
-        r"(promedio|nota[s]?\s*promedio)\s*[:=]?\s*([1-7](?:[.,]\d{1,2})?)", t
-    )
-    if m_prom:
-        promedio = float(m_prom.group(2).replace(",", "."))
-
-    # Asistencia (%)
-    asistencia = None
-    m_asist = re.search(r"(asistencia|presencia)\s*[:=]?\s*(\d{1,3})\s*%?", t)
-    if m_asist:
-        asistencia = min(100, max(0, int(m_asist.group(2))))
-
-    # Asignatura que cuesta
-    asignatura = None
-    m_asig = re.search(
-        r"(me\s+cuesta|dificultad\s+en|complica\s+|problema\s+con)\s+([a-záéíóúñ ]{3,})",
-        t,
-    )
-    if m_asig:
-        asignatura = m_asig.group(2).strip().title()
-
-    return {
-        "edad": edad,
-        "sexo": sexo,
-        "promedio": promedio,          # escala 1–7
-        "asistencia_pct": asistencia,  # 0–100
-        "asignatura_dificil": asignatura,
-    }
-
 # =========================
 # SIMULACIÓN COACH (PLAN)
 # =========================
@@ -265,9 +227,14 @@ def call_predict_with_model(profile: Dict[str, Any]) -> Dict[str, Any]:
 
     dep = 1  # Municipal por defecto
 
-    X = np.array([[float(prom), float(asis), float(edad), float(dep)]])
-    prob_riesgo = float(modelo.predict_proba(X)[0][1])
-    pred_clase = int(modelo.predict(X)[0])
+    prob_riesgo = grilla.buscar_uno(PROM_GRAL=prom, ASISTENCIA=asis, EDAD_ALU=edad, DEPENDENCIA=dep) if grilla is not None else None
+    if prob_riesgo is not None:
+        # Regresión logística binaria: predict() equivale a P(riesgo) > 0.5
+        pred_clase = int(prob_riesgo > 0.5)
+    else:
+        X = np.array([[float(prom), float(asis), float(edad), float(dep)]])
+        prob_riesgo = float(modelo.predict_proba(X)[0][1])
+        pred_clase = int(modelo.predict(X)[0])
 
     drivers = []
     if asis < 85:
@@ -433,7 +400,10 @@ if st.session_state.stage == "predicted":
             "score": st.session_state.score,
             "drivers": st.session_state.drivers,
         }
-        plan = simulate_coach(payload)
+        clave_plan = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+        plan = st.session_state.planes.get(clave_plan)
+        if plan is None:
+            plan = st.session_state.planes[clave_plan] = simulate_coach(payload)
         st.session_state.plan_text = plan
         add_assistant(
             "Listo, armé un **plan de acción personalizado** pensado para acompañarte paso a paso. "
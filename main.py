@@ -3,34 +3,76 @@ main.py - Ejecución completa del Motor de Riesgo
 Hackathon Duoc UC 2025 - Equipo Team 16
 """
 
+import os
+import argparse
+import pandas as pd
+
 # Importaciones desde los módulos
-from src.load import cargar_csv, preparar_dataset
-from src.model import split_temporal, entrenar_modelo
-from src.eval import evaluar_modelo, calibracion, fairness
+from src.cache import cargar_dataset_cache
+from src.dataset import construir_dataset
+from src.load import iterar_csv
+from src.model import (
+    MOTORES, split_temporal, entrenar_modelo, entrenar_xgboost_externo, comparar_motores, FEATURES
+)
+from src.eval import evaluar_modelo, calibracion, fairness, reporte_evaluacion
 
 # ================================================
 # 🚀 PIPELINE COMPLETO
 # ================================================
+# (bajo __main__ porque la ingesta multi-archivo usa procesos hijos)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Entrena y evalúa el motor de riesgo.")
+    parser.add_argument("ruta", nargs="?", default="data/rendimiento-data.csv",
+                        help="archivo CSV o carpeta con un CSV por año")
+    parser.add_argument("--motor", choices=MOTORES, default="logistic")
+    parser.add_argument("--externo", action="store_true",
+                        help="XGBoost en memoria externa leyendo el CSV por bloques (solo archivo CSV)")
+    parser.add_argument("--comparar", action="store_true",
+                        help="entrena ambos motores e imprime tiempo de entrenamiento y AUC")
+    parser.add_argument("--reporte", metavar="JSON",
+                        help="evaluación sin ventanas: escribe las métricas en este JSON")
+    parser.add_argument("--graficos", metavar="CARPETA",
+                        help="con --reporte, guarda los gráficos como PNG en esta carpeta")
+    args = parser.parse_args()
+    ruta = args.ruta
 
-# 1️⃣ Cargar dataset
-df = cargar_csv("data/rendimiento-data.csv")
+    if args.externo:
+        # 1️⃣ - 4️⃣ XGBoost por bloques: el año más reciente queda como test (early stopping)
+        anios = sorted({int(a) for bloque in iterar_csv(ruta, compacto=True) for a in bloque["AGNO"].unique()})
+        if len(anios) < 2:
+            parser.error("--externo necesita al menos dos años en el CSV")
+        pipeline = entrenar_xgboost_externo(ruta, anios_train=anios[:-1], anio_test=anios[-1])
+        test = pd.concat([b[b["AGNO"] == anios[-1]] for b in iterar_csv(ruta, compacto=True)], ignore_index=True)
+        X_test, y_test = test[FEATURES], test["RIESGO"]
+    else:
+        if os.path.isdir(ruta):
+            # 1️⃣ + 2️⃣ Ingesta paralela de los CSV anuales → dataset particionado por AGNO
+            fuente = construir_dataset(ruta)
+        else:
+            # 1️⃣ + 2️⃣ Cargar y preparar datos por bloques (memoria acotada, dtypes compactos, cache Arrow)
+            fuente = cargar_dataset_cache(ruta, compacto=True)
 
-# 2️⃣ Preparar datos
-df_model = preparar_dataset(df)
+        # 3️⃣ División temporal (anti-fuga)
+        X_train, X_test, y_train, y_test = split_temporal(fuente)
 
-# 3️⃣ División temporal (anti-fuga)
-X_train, X_test, y_train, y_test = split_temporal(df_model)
+        if args.comparar:
+            comparar_motores(X_train, y_train, X_test, y_test)
 
-# 4️⃣ Entrenar modelo
-pipeline = entrenar_modelo(X_train, y_train)
+        # 4️⃣ Entrenar modelo (XGBoost usa el año de test para early stopping)
+        pipeline = entrenar_modelo(X_train, y_train, motor=args.motor, X_eval=X_test, y_eval=y_test)
 
-# 5️⃣ Evaluar modelo
-evaluar_modelo(pipeline, X_test, y_test)
+    if args.reporte:
+        # 5️⃣ - 7️⃣ Métricas, calibración y fairness en una sola pasada (JSON + PNG opcionales)
+        reporte_evaluacion(pipeline, X_test, y_test, ruta=args.reporte, carpeta_graficos=args.graficos)
+    else:
+        # 5️⃣ Evaluar modelo
+        evaluar_modelo(pipeline, X_test, y_test)
 
-# 6️⃣ Calibración
-calibracion(pipeline, X_test, y_test)
+        # 6️⃣ Calibración
+        calibracion(pipeline, X_test, y_test)
 
-# 7️⃣ Fairness
-fairness(pipeline, X_test.assign(RIESGO=y_test))
+        # 7️⃣ Fairness
+        fairness(pipeline, X_test.assign(RIESGO=y_test))
 
-print("\n✅ Proceso completado correctamente. Resultados generados.")
+    print("\n✅ Proceso completado correctamente. Resultados generados.")
@@ -0,0 +1,139 @@
+"""
+backtest.py - Backtesting temporal con origen móvil (Motor de Riesgo)
+Parte del proyecto Hackathon Duoc UC 2025
+
+split_temporal evalúa un solo corte (todo lo anterior → último año). backtest evalúa
+cada año de origen y: entrena con AGNO <= y y prueba con el año siguiente, con un
+proceso por origen. Las filas se ordenan por AGNO una vez: así el train de cada
+origen es un prefijo y el test el tramo siguiente, y los workers leen ambos de
+arreglos memory-mapped (src.utils.compartir_arrays) sin recibir una copia de los datos.
+
+Uso:  python -m src.backtest data/rendimiento-data.csv --motor logistic
+"""
+
+import os
+import time
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import roc_auc_score, recall_score, precision_score, f1_score, brier_score_loss
+
+from src.model import FEATURES, MOTORES, entrenar_modelo
+from src.utils import compartir_arrays, abrir_arrays
+
+
+def _cargar(fuente) -> pd.DataFrame:
+    """DataFrame, CSV (vía cache Arrow) o carpeta de dataset particionado."""
+    if isinstance(fuente, pd.DataFrame):
+        return fuente
+    if os.path.isdir(fuente):
+        from src.dataset import leer_dataset
+        return leer_dataset(fuente, ["AGNO"] + FEATURES + ["RIESGO"])
+    from src.cache import cargar_dataset_cache
+    return cargar_dataset_cache(fuente, compacto=True)
+
+
+def _evaluar_origen(rutas: dict, motor: str, anio: int, anio_test: int, fin_train: int, fin_test: int,
+                    n_jobs: int = 1) -> dict:
+    """
+    Worker: entrena con las filas [0, fin_train) y evalúa en [fin_train, fin_test).
+    n_jobs son los hilos de XGBoost de este worker (su parte de los núcleos).
+    """
+    datos = abrir_arrays(rutas)
+    X, y = datos["X"], datos["y"]
+    y_test = np.asarray(y[fin_train:fin_test])
+
+    inicio = time.perf_counter()
+    modelo = entrenar_modelo(X[:fin_train], y[:fin_train], motor=motor, n_jobs=n_jobs)
+    fit_s = time.perf_counter() - inicio
+
+    proba = modelo.predict_proba(X[fin_train:fin_test])[:, 1]
+    pred = proba >= 0.5
+    con_ambas_clases = 0 < y_test.sum() < len(y_test)
+    return {
+        "anio_origen": anio,
+        "anio_test": anio_test,
+        "n_train": fin_train,
+        "n_test": fin_test - fin_train,
+        "tasa_riesgo_test": float(y_test.mean()),
+        "auc": roc_auc_score(y_test, proba) if con_ambas_clases else np.nan,
+        "recall": recall_score(y_test, pred, zero_division=0),
+        "precision": precision_score(y_test, pred, zero_division=0),
+        "f1": f1_score(y_test, pred, zero_division=0),
+        "brier": brier_score_loss(y_test, proba),
+        "fit_s": fit_s,
+    }
+
+
+def backtest(fuente, motor: str = "logistic", workers=None, anio_min=None, cache_dir=None) -> pd.DataFrame:
+    """
+    Evalúa todos los orígenes (train <= y, test el año siguiente) en paralelo y retorna una tabla
+    con una fila por año de test. anio_min descarta orígenes anteriores a ese año.
+    """
+    if motor not in MOTORES:
+        raise ValueError(f"Motor desconocido: {motor} (opciones: {', '.join(MOTORES)})")
+
+    df = _cargar(fuente)
+    df = df.sort_values("AGNO", kind="stable")
+    anios = df["AGNO"].to_numpy()
+    unicos = np.unique(anios)
+    if len(unicos) < 2:
+        raise ValueError("El backtest necesita al menos dos años")
+
+    # fin[a] = primera fila posterior al año a (el orden por AGNO hace que train sea un prefijo)
+    fin = dict(zip(unicos.tolist(), np.searchsorted(anios, unicos, side="right").tolist()))
+    siguiente = dict(zip(unicos[:-1].tolist(), unicos[1:].tolist()))
+    origenes = [a for a in siguiente if anio_min is None or a >= anio_min]
+    if not origenes:
+        raise ValueError(f"No hay años de origen desde {anio_min}")
+
+    carpeta = cache_dir or tempfile.mkdtemp(prefix="backtest-")
+    rutas = compartir_arrays({
+        "X": df[FEATURES].to_numpy(dtype=np.float64),
+        "y": df["RIESGO"].to_numpy(dtype=np.int8),
+    }, carpeta)
+    del df
+
+    # Los núcleos se reparten entre los workers: XGBoost con n_jobs=-1 en cada uno
+    # pondría workers × núcleos hilos a competir
+    workers = min(workers or os.cpu_count() or 1, len(origenes))
+    hilos = max(1, (os.cpu_count() or 1) // workers)
+
+    inicio = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futuros = [
+                pool.submit(_evaluar_origen, rutas, motor, a, siguiente[a], fin[a], fin[siguiente[a]], hilos)
+                for a in origenes
+            ]
+            filas = [f.result() for f in futuros]
+    finally:
+        if cache_dir is None:
+            shutil.rmtree(carpeta, ignore_errors=True)
+
+    tabla = pd.DataFrame(filas).set_index("anio_test")
+    print(f"📅 Backtest {motor}: {len(filas)} orígenes en {time.perf_counter() - inicio:.1f}s")
+    return tabla
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Backtesting temporal con origen móvil.")
+    parser.add_argument("ruta", nargs="?", default="data/rendimiento-data.csv",
+                        help="archivo CSV o carpeta del dataset particionado")
+    parser.add_argument("--motor", choices=MOTORES, default="logistic")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--desde", type=int, default=None, help="primer año de origen")
+    parser.add_argument("--salida", default="data/backtest.csv")
+    args = parser.parse_args()
+
+    tabla = backtest(args.ruta, motor=args.motor, workers=args.workers, anio_min=args.desde)
+    print(tabla.round(4).to_string())
+    if os.path.dirname(args.salida):
+        os.makedirs(os.path.dirname(args.salida), exist_ok=True)
+    tabla.to_csv(args.salida)
+    print(f"💾 Tabla guardada en {args.salida}")
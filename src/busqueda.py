@@ -0,0 +1,216 @@
+"""
+busqueda.py - Búsqueda de hiperparámetros y comparación de motores (Motor de Riesgo)
+Parte del proyecto Hackathon Duoc UC 2025
+
+Successive halving sobre los dos motores de src/model.py:
+- Ronda 0: todos los candidatos con una submuestra pequeña del train.
+- Cada ronda siguiente: pasa 1/factor de los candidatos (primero los que cumplen el
+  recall objetivo, luego por AUC) con factor veces más filas, hasta el train completo.
+Las pruebas de cada ronda se reparten en un pool de procesos. El scaler se ajusta una
+sola vez y los arreglos (crudos y escalados) se comparten por memory-map, así ningún
+trial re-escala ni recibe una copia de los datos.
+
+El resultado es un leaderboard con métricas y tiempos de fit/predict por candidato y
+ronda; elegir_modelo toma el más barato que cumple el recall objetivo.
+
+Uso:  python -m src.busqueda data/rendimiento-data.csv --recall 0.7
+"""
+
+import os
+import time
+import shutil
+import tempfile
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import roc_auc_score, recall_score, precision_score, f1_score
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from src.model import XGB_PARAMS, FEATURES
+from src.utils import compartir_arrays, abrir_arrays
+
+RECALL_OBJETIVO = 0.7
+
+
+def candidatos_por_defecto(ratio_clases: float = 1.0) -> list:
+    """Grilla base: 8 logísticas y 8 XGBoost. ratio_clases = negativos/positivos del train."""
+    lineales = [
+        {"motor": "logistic", "C": C, "class_weight": cw}
+        for C, cw in itertools.product([0.01, 0.1, 1.0, 10.0], [None, "balanced"])
+    ]
+    arboles = [
+        {"motor": "xgboost", "max_depth": d, "learning_rate": lr, "n_estimators": 200,
+         "scale_pos_weight": spw}
+        for d, lr, spw in itertools.product([3, 6], [0.05, 0.2], [1.0, round(ratio_clases, 2)])
+    ]
+    return lineales + arboles
+
+
+def _nombre(candidato: dict) -> str:
+    return ", ".join(f"{k}={v}" for k, v in candidato.items())
+
+
+def _crear_modelo(candidato: dict, n_jobs: int = 1):
+    params = {k: v for k, v in candidato.items() if k != "motor"}
+    if candidato["motor"] == "xgboost":
+        import xgboost as xgb
+        return xgb.XGBClassifier(**{**XGB_PARAMS, "n_jobs": n_jobs, **params})
+    return LogisticRegression(max_iter=1000, random_state=42, **params)
+
+
+def _evaluar(candidato: dict, rutas: dict, n_filas: int, n_jobs: int = 1) -> dict:
+    """
+    Worker: ajusta el candidato con las primeras n_filas del train (ya barajado) y lo evalúa.
+    n_jobs son los hilos de XGBoost de este worker (su parte de los núcleos).
+    """
+    datos = abrir_arrays(rutas)
+    # La logística usa los datos escalados con el scaler compartido; XGBoost, los crudos
+    sufijo = "_esc" if candidato["motor"] == "logistic" else ""
+    X, y = datos["X_train" + sufijo][:n_filas], datos["y_train"][:n_filas]
+    X_val, y_val = datos["X_val" + sufijo], datos["y_val"]
+
+    modelo = _crear_modelo(candidato, n_jobs=n_jobs)
+    inicio = time.perf_counter()
+    modelo.fit(X, y)
+    fit_s = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    proba = modelo.predict_proba(X_val)[:, 1]
+    predict_s = time.perf_counter() - inicio
+    pred = proba >= 0.5
+
+    return {
+        "candidato": _nombre(candidato),
+        "params": candidato,
+        "motor": candidato["motor"],
+        "n_filas": n_filas,
+        "auc": roc_auc_score(y_val, proba),
+        "recall": recall_score(y_val, pred, zero_division=0),
+        "precision": precision_score(y_val, pred, zero_division=0),
+        "f1": f1_score(y_val, pred, zero_division=0),
+        "fit_s": fit_s,
+        "predict_ms_1k": 1000 * predict_s / len(y_val) * 1000,
+    }
+
+
+def busqueda_halving(X_train, y_train, X_val, y_val, candidatos=None, factor: int = 3,
+                     min_filas: int = 20_000, recall_objetivo: float = RECALL_OBJETIVO,
+                     workers=None, cache_dir=None) -> pd.DataFrame:
+    """
+    Ejecuta successive halving y retorna el leaderboard (una fila por candidato y ronda).
+    X_val/y_val es el conjunto de validación temporal (p. ej. el año de test de split_temporal).
+    """
+    X_train = np.asarray(X_train[FEATURES] if isinstance(X_train, pd.DataFrame) else X_train, dtype=np.float64)
+    X_val = np.asarray(X_val[FEATURES] if isinstance(X_val, pd.DataFrame) else X_val, dtype=np.float64)
+    y_train = np.asarray(y_train, dtype=np.int8)
+    y_val = np.asarray(y_val, dtype=np.int8)
+
+    if candidatos is None:
+        positivos = max(int(y_train.sum()), 1)
+        candidatos = candidatos_por_defecto((len(y_train) - positivos) / positivos)
+
+    # Preprocesamiento compartido: orden aleatorio fijo (cada ronda usa un prefijo) y un scaler
+    orden = np.random.default_rng(42).permutation(len(y_train))
+    X_train, y_train = X_train[orden], y_train[orden]
+    scaler = StandardScaler().fit(X_train)
+
+    carpeta = cache_dir or tempfile.mkdtemp(prefix="busqueda-")
+    rutas = compartir_arrays({
+        "X_train": X_train, "X_train_esc": scaler.transform(X_train), "y_train": y_train,
+        "X_val": X_val, "X_val_esc": scaler.transform(X_val), "y_val": y_val,
+    }, carpeta)
+
+    # Tamaños de ronda: ... n/factor², n/factor, n
+    rondas = int(np.log(len(candidatos)) // np.log(factor)) + 1
+    tamanos = [max(min(min_filas, len(y_train)), len(y_train) // factor ** (rondas - 1 - r)) for r in range(rondas)]
+
+    filas = []
+    vivos = list(candidatos)
+    workers = workers or os.cpu_count() or 1
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for ronda, n_filas in enumerate(tamanos):
+                inicio = time.perf_counter()
+                # Núcleos repartidos entre las pruebas simultáneas de la ronda (menos pruebas, más hilos cada una)
+                hilos = max(1, (os.cpu_count() or 1) // min(workers, len(vivos)))
+                resultados = list(pool.map(_evaluar, vivos, [rutas] * len(vivos), [n_filas] * len(vivos),
+                                           [hilos] * len(vivos)))
+                for r in resultados:
+                    r["ronda"] = ronda
+                filas.extend(resultados)
+                print(f"🔎 Ronda {ronda}: {len(vivos)} candidatos con {n_filas} filas "
+                      f"({time.perf_counter() - inicio:.1f}s)")
+
+                if ronda == len(tamanos) - 1:
+                    break
+                ranking = sorted(
+                    range(len(vivos)),
+                    key=lambda i: (resultados[i]["recall"] >= recall_objetivo, resultados[i]["auc"]),
+                    reverse=True,
+                )
+                vivos = [vivos[i] for i in ranking[:max(1, len(vivos) // factor)]]
+    finally:
+        if cache_dir is None:
+            shutil.rmtree(carpeta, ignore_errors=True)
+
+    leaderboard = pd.DataFrame(filas)
+    leaderboard["cumple_recall"] = leaderboard["recall"] >= recall_objetivo
+    return leaderboard.sort_values(["ronda", "auc"], ascending=[False, False]).reset_index(drop=True)
+
+
+def elegir_modelo(leaderboard: pd.DataFrame, recall_objetivo: float = RECALL_OBJETIVO):
+    """
+    Fila del candidato más barato de servir (predict ms/1k, desempate por AUC) entre los
+    sobrevivientes de la última ronda que cumplen el recall objetivo. Los descartados
+    antes solo se midieron con submuestras chicas y no compiten con esas métricas.
+    None si ninguno lo cumple. reentrenar(fila["params"], ...) lo ajusta con todo el train.
+    """
+    ultima = leaderboard[leaderboard["ronda"] == leaderboard["ronda"].max()]
+    cumplen = ultima[ultima["recall"] >= recall_objetivo]
+    if cumplen.empty:
+        return None
+    return cumplen.sort_values(["predict_ms_1k", "auc"], ascending=[True, False]).iloc[0]
+
+
+def reentrenar(candidato: dict, X_train, y_train):
+    """Ajusta el candidato elegido con todo el train. La logística vuelve como Pipeline(scaler, model)."""
+    modelo = _crear_modelo(candidato, n_jobs=-1)
+    if candidato["motor"] == "logistic":
+        modelo = Pipeline([("scaler", StandardScaler()), ("model", modelo)])
+    return modelo.fit(X_train, y_train)
+
+
+if __name__ == "__main__":
+    import argparse
+    from src.cache import cargar_dataset_cache
+    from src.model import split_temporal
+
+    parser = argparse.ArgumentParser(description="Successive halving sobre los motores de riesgo.")
+    parser.add_argument("ruta", nargs="?", default="data/rendimiento-data.csv")
+    parser.add_argument("--recall", type=float, default=RECALL_OBJETIVO)
+    parser.add_argument("--factor", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--salida", default="data/leaderboard.csv")
+    args = parser.parse_args()
+
+    X_train, X_test, y_train, y_test = split_temporal(cargar_dataset_cache(args.ruta, compacto=True))
+    tabla = busqueda_halving(X_train, y_train, X_test, y_test, factor=args.factor,
+                             recall_objetivo=args.recall, workers=args.workers)
+    with pd.option_context("display.width", 200, "display.max_colwidth", 70):
+        print(tabla.drop(columns="params").round(4).to_string(index=False))
+    if os.path.dirname(args.salida):
+        os.makedirs(os.path.dirname(args.salida), exist_ok=True)
+    tabla.drop(columns="params").to_csv(args.salida, index=False)
+    print(f"💾 Leaderboard guardado en {args.salida}")
+
+    mejor = elegir_modelo(tabla, args.recall)
+    if mejor is None:
+        print(f"⚠️ Ningún candidato alcanza recall ≥ {args.recall}")
+    else:
+        print(f"🏆 Más barato con recall ≥ {args.recall}: {mejor['candidato']} "
+              f"(AUC {mejor['auc']:.3f}, recall {mejor['recall']:.3f}, "
+              f"predict {mejor['predict_ms_1k']:.2f} ms/1k, fit {mejor['fit_s']:.1f}s)")
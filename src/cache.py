@@ -0,0 +1,96 @@
+"""
+cache.py - Cache columnar (Arrow) del dataset preparado
+Parte del proyecto Hackathon Duoc UC 2025 (Tutor Virtual Adaptativo IA Híbrida)
+
+El df_model se guarda en formato Arrow IPC sin compresión, identificado por el
+hash del CSV de origen + VERSION_PREPARACION. Las ejecuciones siguientes lo abren
+con memory-map y solo se reconstruye si cambia el archivo o la lógica de preparación.
+"""
+
+import os
+import json
+import glob
+import hashlib
+
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+from src.load import cargar_dataset, VERSION_PREPARACION
+
+CACHE_DIR = "data/cache"
+
+def huella_archivo(ruta, bloque=1 << 20):
+    """SHA-256 del contenido del archivo, leído por bloques."""
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for parte in iter(lambda: f.read(bloque), b""):
+            h.update(parte)
+    return h.hexdigest()
+
+def _huella_rapida(ruta, cache_dir):
+    """
+    Reutiliza el hash guardado si tamaño y mtime no cambiaron,
+    para no releer archivos de varios GB en cada ejecución.
+    """
+    st = os.stat(ruta)
+    meta_path = os.path.join(cache_dir, _nombre_base(ruta) + ".meta.json")
+    if os.path.exists(meta_path):
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("size") == st.st_size and meta.get("mtime_ns") == st.st_mtime_ns:
+            return meta["sha256"]
+
+    sha = huella_archivo(ruta)
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump({"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": sha}, f)
+    return sha
+
+def _nombre_base(ruta):
+    return os.path.splitext(os.path.basename(ruta))[0]
+
+def _prefijo(ruta, compacto):
+    return _nombre_base(ruta) + ("-compacto" if compacto else "")
+
+def ruta_cache(ruta, cache_dir=CACHE_DIR, compacto=False):
+    """Ruta del archivo Arrow correspondiente al CSV y a la versión de preparación actuales."""
+    os.makedirs(cache_dir, exist_ok=True)
+    clave = hashlib.sha256(
+        f"{_huella_rapida(ruta, cache_dir)}:{VERSION_PREPARACION}".encode()
+    ).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{_prefijo(ruta, compacto)}-{clave}.arrow")
+
+def guardar_tabla(df_model, destino):
+    """Escribe df_model como Arrow IPC (escritura atómica vía archivo temporal)."""
+    tabla = pa.Table.from_pandas(df_model, preserve_index=False)
+    tmp = destino + ".tmp"
+    with pa.OSFile(tmp, "wb") as sink:
+        with ipc.new_file(sink, tabla.schema) as writer:
+            writer.write_table(tabla)
+    os.replace(tmp, destino)
+
+def leer_tabla(origen):
+    """Abre la tabla Arrow con memory-map y la devuelve como DataFrame."""
+    with pa.memory_map(origen, "r") as source:
+        tabla = ipc.open_file(source).read_all()
+    return tabla.to_pandas()
+
+def cargar_dataset_cache(ruta="data/rendimiento-data.csv", cache_dir=CACHE_DIR, chunksize=500_000,
+                         compacto=False):
+    """
+    Devuelve df_model desde la cache si coincide la huella del CSV y la versión
+    de preparación; si no, lo reconstruye con cargar_dataset y lo guarda.
+    """
+    destino = ruta_cache(ruta, cache_dir, compacto=compacto)
+    if os.path.exists(destino):
+        df_model = leer_tabla(destino)
+        print(f"♻️ Dataset cargado desde cache: {destino} ({len(df_model)} filas)")
+        return df_model
+
+    df_model = cargar_dataset(ruta, chunksize=chunksize, compacto=compacto)
+
+    # Limpiamos versiones antiguas del mismo origen antes de escribir la nueva
+    for viejo in glob.glob(os.path.join(cache_dir, f"{_prefijo(ruta, compacto)}-{'[0-9a-f]' * 16}.arrow")):
+        os.remove(viejo)
+    guardar_tabla(df_model, destino)
+    print(f"💾 Cache actualizada: {destino}")
+    return df_model
@@ -0,0 +1,171 @@
+"""
+biblioteca.py — Biblioteca offline de planes precalculados por "bucket" de perfil.
+
+La mayoría de los estudiantes cae en pocas situaciones: una banda de asistencia,
+una banda de promedio, un grupo etario y un género. Un job batch genera con el coach
+un plan para el perfil representativo de cada bucket y lo guarda en SQLite (clave
+primaria = bucket). La app devuelve ese plan al instante y solo llama al LLM en vivo
+cuando el orientador pide una versión totalmente personalizada.
+
+Las bandas respetan los umbrales de derivación (85% / 5.0) y de la heurística de
+riesgo (90% / 5.3), así el representante cae del mismo lado que el alumno real.
+
+Generar la biblioteca:  python -m src.coach.biblioteca
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import itertools
+from typing import List, Optional, Tuple
+
+from src.coach.pipeline import PerfilAlumno, MODELO_COACH, armar_resultado
+from src.coach.prompt import PROMPT_TEMPLATE
+
+BIBLIOTECA_PATH = "data/biblioteca_planes.sqlite"
+
+# (desde, hasta) semiabiertos → valor representativo
+BANDAS_ASISTENCIA = [((0, 75), 70), ((75, 85), 80), ((85, 90), 87), ((90, 101), 95)]
+BANDAS_PROMEDIO = [((1.0, 4.0), 3.5), ((4.0, 5.0), 4.5), ((5.0, 5.3), 5.1), ((5.3, 6.0), 5.6), ((6.0, 7.1), 6.5)]
+BANDAS_EDAD = [((5, 11), 9), ((11, 15), 13), ((15, 19), 16), ((19, 26), 20)]
+GENEROS = [1, 2]
+
+
+def version_biblioteca() -> str:
+    """Cambia si cambia la plantilla del prompt o el modelo: la biblioteca queda obsoleta."""
+    return hashlib.sha256(f"{MODELO_COACH}\n{PROMPT_TEMPLATE}".encode("utf-8")).hexdigest()[:16]
+
+
+def _banda(valor: float, bandas) -> Optional[int]:
+    for i, ((desde, hasta), _) in enumerate(bandas):
+        if desde <= valor < hasta:
+            return i
+    return None
+
+
+def bucket_de(perfil: PerfilAlumno) -> Optional[Tuple[int, int, int, int]]:
+    """Bucket (banda asistencia, banda promedio, grupo etario, género) o None si está fuera de rango."""
+    b = (
+        _banda(perfil.asistencia, BANDAS_ASISTENCIA),
+        _banda(perfil.promedio, BANDAS_PROMEDIO),
+        _banda(perfil.edad, BANDAS_EDAD),
+        perfil.genero if perfil.genero in GENEROS else None,
+    )
+    return None if None in b else b
+
+
+def clave_bucket(bucket: Tuple[int, int, int, int]) -> str:
+    return "-".join(str(x) for x in bucket)
+
+
+def perfil_representativo(bucket: Tuple[int, int, int, int]) -> PerfilAlumno:
+    a, p, e, g = bucket
+    return PerfilAlumno(
+        asistencia=BANDAS_ASISTENCIA[a][1],
+        promedio=BANDAS_PROMEDIO[p][1],
+        edad=BANDAS_EDAD[e][1],
+        genero=g,
+    )
+
+
+def todos_los_buckets() -> List[Tuple[int, int, int, int]]:
+    return list(itertools.product(
+        range(len(BANDAS_ASISTENCIA)), range(len(BANDAS_PROMEDIO)), range(len(BANDAS_EDAD)), GENEROS
+    ))
+
+
+def _conectar(ruta: str) -> sqlite3.Connection:
+    if os.path.dirname(ruta):
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    db = sqlite3.connect(ruta, check_same_thread=False)
+    db.execute("CREATE TABLE IF NOT EXISTS meta (clave TEXT PRIMARY KEY, valor TEXT)")
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS planes (
+            bucket TEXT PRIMARY KEY,
+            perfil TEXT NOT NULL,
+            plan TEXT NOT NULL,
+            fuentes TEXT NOT NULL,
+            creado REAL NOT NULL
+        )
+    """)
+    return db
+
+
+def generar_biblioteca(ruta: str = BIBLIOTECA_PATH, max_concurrencia: int = 8,
+                       tokens_por_minuto: Optional[int] = None, solo_faltantes: bool = True) -> int:
+    """
+    Genera (en lote async) los planes de todos los buckets y los guarda en ruta.
+    Con solo_faltantes, reanuda un job interrumpido sin regenerar lo ya guardado.
+    Retorna la cantidad de planes generados.
+    """
+    from src.coach.pipeline_async import coach_plan_lote
+
+    db = _conectar(ruta)
+    version = version_biblioteca()
+    previa = db.execute("SELECT valor FROM meta WHERE clave = 'version'").fetchone()
+    if previa is None or previa[0] != version:
+        db.execute("DELETE FROM planes")
+        db.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (version,))
+        db.commit()
+
+    existentes = {r[0] for r in db.execute("SELECT bucket FROM planes")} if solo_faltantes else set()
+    pendientes = [b for b in todos_los_buckets() if clave_bucket(b) not in existentes]
+    if not pendientes:
+        print(f"✅ Biblioteca completa en {ruta}")
+        return 0
+
+    perfiles = [perfil_representativo(b) for b in pendientes]
+    resultados = coach_plan_lote(perfiles, max_concurrencia=max_concurrencia,
+                                 tokens_por_minuto=tokens_por_minuto, return_exceptions=True)
+
+    generados = 0
+    for bucket, perfil, res in zip(pendientes, perfiles, resultados):
+        if isinstance(res, BaseException):
+            print(f"⚠️ Bucket {clave_bucket(bucket)} falló: {res}")
+            continue
+        db.execute(
+            "INSERT OR REPLACE INTO planes VALUES (?, ?, ?, ?, ?)",
+            (clave_bucket(bucket), json.dumps(perfil.__dict__), res["plan"],
+             json.dumps(res["fuentes"], ensure_ascii=False), time.time()),
+        )
+        generados += 1
+    db.commit()
+    db.close()
+    print(f"💾 {generados} planes guardados en {ruta}")
+    return generados
+
+
+_CONEXIONES = {}
+
+
+def plan_desde_biblioteca(perfil: PerfilAlumno, ruta: str = BIBLIOTECA_PATH) -> Optional[dict]:
+    """
+    Plan precalculado del bucket del perfil, con la derivación evaluada sobre los
+    valores reales del alumno. None si no hay biblioteca vigente o el bucket no existe.
+    """
+    bucket = bucket_de(perfil)
+    if bucket is None or not os.path.exists(ruta):
+        return None
+    db = _CONEXIONES.get(ruta)
+    if db is None:
+        db = _CONEXIONES[ruta] = _conectar(ruta)
+
+    version = db.execute("SELECT valor FROM meta WHERE clave = 'version'").fetchone()
+    if version is None or version[0] != version_biblioteca():
+        return None
+    fila = db.execute("SELECT plan, fuentes FROM planes WHERE bucket = ?", (clave_bucket(bucket),)).fetchone()
+    if fila is None:
+        return None
+
+    plan_text, fuentes = fila
+    resultado = armar_resultado(perfil, plan_text, [])
+    resultado["fuentes"] = json.loads(fuentes)
+    resultado["origen"] = "biblioteca"
+    resultado["bucket"] = clave_bucket(bucket)
+    return resultado
+
+
+if __name__ == "__main__":
+    generar_biblioteca()
@@ -2,6 +2,6 @@
 coach_llm.py — Orquestador que combina pipeline + derivación + RAG
 """
 
-from src.coach.pipeline import PerfilAlumno, coach_plan
+from src.coach.pipeline import PerfilAlumno, coach_plan, coach_plan_stream
 
-__all__ = ["PerfilAlumno", "coach_plan"]
+__all__ = ["PerfilAlumno", "coach_plan", "coach_plan_stream"]
@@ -0,0 +1,170 @@
+"""
+grilla.py — Grilla precalculada de probabilidades de riesgo (lookup O(1)).
+
+Las entradas del modelo son acotadas y discretas en la práctica (asistencia 0–100,
+promedio 1.0–7.0 en pasos de 0.1, edad 5–25, ...), así que se puede evaluar el modelo
+una sola vez sobre todas las combinaciones y guardar el resultado en un .npy que se
+abre con memory-map. En producción, predecir es un cálculo de índice; los valores
+fuera de la grilla (p.ej. promedio 5.25) vuelven al modelo.
+"""
+
+import os
+import json
+import hashlib
+from dataclasses import dataclass, asdict
+from typing import List, Optional
+
+import numpy as np
+
+from src.coach.scorer import features_de
+
+
+@dataclass
+class Eje:
+    nombre: str
+    minimo: float
+    paso: float
+    n: int
+
+    def valores(self) -> np.ndarray:
+        # Redondeo para que 1.0 + 0.1*2 sea exactamente 1.2 (igual que el input del usuario)
+        return np.round(self.minimo + self.paso * np.arange(self.n), 10)
+
+
+# Features del modelo de riesgo, en el orden de src.model.FEATURES
+EJES_RIESGO = [
+    Eje("PROM_GRAL", 1.0, 0.1, 61),
+    Eje("ASISTENCIA", 0, 1, 101),
+    Eje("GEN_ALU", 1, 1, 2),
+    Eje("EDAD_ALU", 5, 1, 21),
+]
+
+# Features del modelo de la demo (fronted.py): [promedio, asistencia, edad, dependencia=1]
+EJES_DEMO = [
+    Eje("PROM_GRAL", 1.0, 0.1, 61),
+    Eje("ASISTENCIA", 0, 1, 101),
+    Eje("EDAD_ALU", 5, 1, 21),
+    Eje("DEPENDENCIA", 1, 1, 1),
+]
+
+
+def ejes_para(features: List[str], ejes: List[Eje] = EJES_RIESGO) -> List[Eje]:
+    """Los ejes de las features indicadas, en ese orden (el de las columnas del modelo)."""
+    por_nombre = {e.nombre: e for e in ejes}
+    faltantes = [f for f in features if f not in por_nombre]
+    if faltantes:
+        raise ValueError(f"No hay eje de grilla para: {', '.join(faltantes)}")
+    return [por_nombre[f] for f in features]
+
+
+def huella_modelo(ruta: str) -> str:
+    """SHA-256 del archivo del modelo, para detectar grillas desactualizadas."""
+    with open(ruta, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+class GrillaRiesgo:
+    """Probabilidad P(riesgo) para cada combinación de valores de los ejes."""
+
+    def __init__(self, ejes: List[Eje], proba: np.ndarray, modelo_sha256: Optional[str] = None):
+        self.ejes = ejes
+        self.proba = proba
+        self.modelo_sha256 = modelo_sha256
+
+    @classmethod
+    def construir(cls, modelo, ejes: List[Eje], modelo_sha256: Optional[str] = None,
+                  bloque: int = 65536) -> "GrillaRiesgo":
+        """
+        Evalúa modelo.predict_proba sobre toda la grilla (en bloques). Las columnas van
+        en el orden de ejes, que debe coincidir con las features del modelo si las guarda.
+        """
+        features = features_de(modelo)
+        if features is not None and features != [e.nombre for e in ejes]:
+            raise ValueError(f"Los ejes {[e.nombre for e in ejes]} no siguen las features del modelo {features}")
+        malla = np.meshgrid(*[e.valores() for e in ejes], indexing="ij")
+        X = np.column_stack([m.ravel() for m in malla])
+        proba = np.empty(len(X), dtype=np.float64)
+        for inicio in range(0, len(X), bloque):
+            proba[inicio:inicio + bloque] = modelo.predict_proba(X[inicio:inicio + bloque])[:, 1]
+        return cls(ejes, proba.reshape([e.n for e in ejes]), modelo_sha256)
+
+    def guardar(self, ruta: str) -> None:
+        """Guarda la grilla en ruta (.npy) y sus ejes en un .json al lado."""
+        np.save(ruta, self.proba)
+        with open(os.path.splitext(ruta)[0] + ".json", "w", encoding="utf-8") as f:
+            json.dump({
+                "ejes": [asdict(e) for e in self.ejes],
+                "modelo_sha256": self.modelo_sha256,
+            }, f, indent=2)
+
+    @classmethod
+    def cargar(cls, ruta: str, modelo_path: Optional[str] = None) -> "GrillaRiesgo":
+        """Abre la grilla con memory-map. Si se indica modelo_path, verifica que corresponda a ese modelo."""
+        with open(os.path.splitext(ruta)[0] + ".json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if modelo_path is not None and meta.get("modelo_sha256") != huella_modelo(modelo_path):
+            raise ValueError("La grilla no corresponde al modelo actual; vuelve a construirla.")
+        ejes = [Eje(**e) for e in meta["ejes"]]
+        return cls(ejes, np.load(ruta, mmap_mode="r"), meta.get("modelo_sha256"))
+
+    def buscar(self, valores) -> np.ndarray:
+        """
+        Probabilidades para cada fila; valores mapea el nombre de cada eje a su columna
+        (dict de arreglos o DataFrame). Las filas fuera de la grilla quedan en NaN para
+        que el llamador use el modelo.
+        """
+        columnas = [np.atleast_1d(np.asarray(valores[e.nombre], dtype=np.float64)) for e in self.ejes]
+        n = len(columnas[0])
+        en_grilla = np.ones(n, dtype=bool)
+        indices = []
+        for x, eje in zip(columnas, self.ejes):
+            k = np.rint((x - eje.minimo) / eje.paso)
+            k = np.where(np.isfinite(k), k, -1)
+            en_grilla &= (k >= 0) & (k < eje.n)
+            k = np.clip(k, 0, eje.n - 1).astype(np.intp)
+            # Solo cuenta si el valor es exactamente un punto de la grilla
+            en_grilla &= np.round(eje.minimo + eje.paso * k, 10) == x
+            indices.append(k)
+
+        proba = np.full(n, np.nan)
+        plano = np.ravel_multi_index(indices, self.proba.shape)
+        proba[en_grilla] = self.proba.reshape(-1)[plano[en_grilla]]
+        return proba
+
+    def buscar_uno(self, **valores) -> Optional[float]:
+        """
+        Lookup de una sola fila en Python puro (sin overhead de arreglos), con un valor por
+        eje: buscar_uno(PROM_GRAL=5.0, ASISTENCIA=85, ...). None si está fuera de la grilla.
+        """
+        indice = []
+        for eje in self.ejes:
+            v = valores[eje.nombre]
+            try:
+                k = round((float(v) - eje.minimo) / eje.paso)
+            except (TypeError, ValueError, OverflowError):
+                return None
+            if not (0 <= k < eje.n) or round(eje.minimo + eje.paso * k, 10) != v:
+                return None
+            indice.append(k)
+        return float(self.proba[tuple(indice)])
+
+
+# Precalcular la grilla de un modelo guardado con joblib
+if __name__ == "__main__":
+    import argparse
+    import joblib
+
+    parser = argparse.ArgumentParser(description="Precalcula la grilla de riesgo de un modelo .pkl")
+    parser.add_argument("modelo", help="Ruta del modelo (.pkl)")
+    parser.add_argument("salida", help="Ruta de la grilla (.npy)")
+    parser.add_argument("--demo", action="store_true", help="Usar los ejes del modelo de fronted.py")
+    args = parser.parse_args()
+
+    modelo = joblib.load(args.modelo)
+    if args.demo:
+        ejes = EJES_DEMO
+    else:
+        ejes = ejes_para(features_de(modelo) or [e.nombre for e in EJES_RIESGO])
+    grilla = GrillaRiesgo.construir(modelo, ejes, modelo_sha256=huella_modelo(args.modelo))
+    grilla.guardar(args.salida)
+    print(f"💾 Grilla guardada en {args.salida} ({grilla.proba.size} celdas)")
@@ -1,39 +1,104 @@
 """
 modelo_riesgo.py — Cálculo del riesgo de deserción usando un modelo ML entrenado.
-Puedes reemplazar el modelo base (dummy) con tu modelo real Logistic Regression / XGBoost.
+Puedes reemplazar el modelo base (dummy) con tu modelo real Logistic Regression / XGBoost
+(MOTOR_RIESGO=xgboost usa el modelo exportado con src.model.exportar_xgboost).
 """
 
 import numpy as np
-import joblib
+import pandas as pd
 import os
 
+from src.coach.scorer import ScorerLineal, ENTRADAS_RIESGO, FEATURES_RIESGO, features_de, validar_features
+from src.coach.grilla import GrillaRiesgo, ejes_para, huella_modelo
+
 # Carga opcional del modelo entrenado
 # (ajusta la ruta si tu modelo está en otra carpeta, por ejemplo "models/modelo_riesgo.pkl")
 MODEL_PATH = os.path.join(os.path.dirname(__file__), "modelo_riesgo.pkl")
+# Scorer exportado con src.model.exportar_scorer: se prefiere porque no importa sklearn
+SCORER_PATH = os.path.join(os.path.dirname(__file__), "modelo_riesgo.json")
+# Motor XGBoost exportado con src.model.exportar_xgboost (formato nativo JSON)
+XGB_PATH = os.path.join(os.path.dirname(__file__), "modelo_riesgo_xgb.json")
+# Motor a usar: "logistic" (scorer JSON o .pkl) o "xgboost" (XGB_PATH)
+MOTOR = os.getenv("MOTOR_RIESGO", "logistic")
+# Grilla precalculada opcional (ver construir_grilla)
+GRILLA_PATH = os.path.join(os.path.dirname(__file__), "modelo_riesgo_grilla.npy")
 
-# Verificamos si existe un modelo entrenado
 modelo_ml = None
-if os.path.exists(MODEL_PATH):
+modelo_origen = None
+# Columnas que recibe modelo_ml, en su orden (ver activar_modelo)
+FEATURES = list(FEATURES_RIESGO)
+grilla = None
+
+
+def activar_modelo(modelo, origen: str = None) -> None:
+    """
+    Usa modelo para predecir. Las columnas se arman en el orden de sus features
+    (los modelos sin nombres se asumen entrenados con src.model.FEATURES); falla
+    con ValueError si alguna no se puede construir desde las entradas de predecir_riesgo.
+    """
+    global modelo_ml, modelo_origen, FEATURES, grilla
+    FEATURES = validar_features(features_de(modelo) or FEATURES_RIESGO)
+    modelo_ml, modelo_origen, grilla = modelo, origen, None
+
+
+# Verificamos si existe un modelo entrenado
+if MOTOR == "xgboost":
+    if os.path.exists(XGB_PATH):
+        try:
+            import xgboost as xgb
+            modelo_xgb = xgb.XGBClassifier()
+            modelo_xgb.load_model(XGB_PATH)
+            activar_modelo(modelo_xgb, XGB_PATH)
+        except Exception as e:
+            print(f"⚠️ No se pudo cargar el modelo XGBoost: {e}")
+    else:
+        print("ℹ️ No se encontró modelo_riesgo_xgb.json, se usará el motor logístico.")
+
+if modelo_ml is None and os.path.exists(SCORER_PATH):
+    try:
+        activar_modelo(ScorerLineal.cargar(SCORER_PATH), SCORER_PATH)
+    except Exception as e:
+        print(f"⚠️ No se pudo cargar el scorer exportado: {e}")
+
+if modelo_ml is None and os.path.exists(MODEL_PATH):
     try:
-        modelo_ml = joblib.load(MODEL_PATH)
+        import joblib
+        activar_modelo(joblib.load(MODEL_PATH), MODEL_PATH)
     except Exception as e:
         print(f"⚠️ No se pudo cargar el modelo ML: {e}")
-else:
+elif modelo_ml is None:
     print("ℹ️ No se encontró modelo_riesgo.pkl, se usará el cálculo heurístico base.")
 
+if modelo_ml is not None and os.path.exists(GRILLA_PATH):
+    try:
+        grilla = GrillaRiesgo.cargar(GRILLA_PATH, modelo_path=modelo_origen)
+        if sorted(e.nombre for e in grilla.ejes) != sorted(FEATURES):
+            grilla = None
+            raise ValueError("sus ejes no son las features del modelo; vuelve a construirla.")
+    except Exception as e:
+        print(f"⚠️ No se usará la grilla de riesgo: {e}")
+
+# Umbrales de nivel sobre la probabilidad del modelo
+UMBRAL_ALTO = 0.75
+UMBRAL_MEDIO = 0.45
+
 
-def predecir_riesgo(asistencia: float, promedio: float, edad: int) -> tuple:
+def predecir_riesgo(asistencia: float, promedio: float, edad: int, genero: int) -> tuple:
     """
-    Retorna (nivel_riesgo, probabilidad)
+    Retorna (nivel_riesgo, probabilidad). genero: 1 masculino, 2 femenino (GEN_ALU).
     Si no hay modelo entrenado, usa una heurística simple.
     """
-    # Si hay modelo entrenado, usamos predicción real
+    # Si hay modelo entrenado, usamos predicción real (vía grilla si el punto está en ella)
     if modelo_ml is not None:
-        X = np.array([[asistencia, promedio, edad]])
-        prob = modelo_ml.predict_proba(X)[0][1]  # probabilidad de deserción
+        entradas = {"asistencia": asistencia, "promedio": promedio, "edad": edad, "genero": genero}
+        fila = {f: entradas[ENTRADAS_RIESGO[f]] for f in FEATURES}
+        prob = grilla.buscar_uno(**fila) if grilla is not None else None
+        if prob is None:
+            X = np.array([list(fila.values())], dtype=np.float64)
+            prob = modelo_ml.predict_proba(X)[0][1]  # probabilidad de deserción
         nivel = (
-            "Alto" if prob >= 0.75 else
-            "Medio" if prob >= 0.45 else
+            "Alto" if prob >= UMBRAL_ALTO else
+            "Medio" if prob >= UMBRAL_MEDIO else
             "Bajo"
         )
         return nivel, round(float(prob), 2)
@@ -45,3 +110,80 @@ def predecir_riesgo(asistencia: float, promedio: float, edad: int) -> tuple:
         return "Medio", 0.55
     else:
         return "Bajo", 0.25
+
+
+def predecir_riesgo_lote(df=None, *, asistencia=None, promedio=None, edad=None, genero=None,
+                         chunksize: int = 50_000) -> pd.DataFrame:
+    """
+    Versión vectorizada de predecir_riesgo para nóminas completas.
+    Recibe un DataFrame con columnas asistencia/promedio/edad/genero (o
+    ASISTENCIA/PROM_GRAL/EDAD_ALU/GEN_ALU) o bien los arreglos por separado; genero
+    solo es obligatorio si el modelo lo usa. Retorna un DataFrame con columnas
+    nivel y probabilidad, fila a fila idéntico a llamar predecir_riesgo.
+    """
+    if df is not None:
+        cols = {c.lower(): c for c in df.columns}
+        asistencia = df[cols.get("asistencia", "ASISTENCIA")]
+        promedio = df[cols.get("promedio", "PROM_GRAL")]
+        edad = df[cols.get("edad", "EDAD_ALU")]
+        genero = df.get(cols.get("genero", "GEN_ALU"))
+    index = asistencia.index if isinstance(asistencia, pd.Series) else None
+
+    asistencia = np.asarray(asistencia, dtype=np.float64)
+    promedio = np.asarray(promedio, dtype=np.float64)
+    edad = np.asarray(edad, dtype=np.float64)
+
+    if modelo_ml is not None:
+        entradas = {"asistencia": asistencia, "promedio": promedio, "edad": edad, "genero": genero}
+        faltan = [f for f in FEATURES if entradas[ENTRADAS_RIESGO[f]] is None]
+        if faltan:
+            raise ValueError(f"El modelo necesita {', '.join(faltan)}")
+        X = np.column_stack([np.asarray(entradas[ENTRADAS_RIESGO[f]], dtype=np.float64) for f in FEATURES])
+        if grilla is not None:
+            prob = grilla.buscar(dict(zip(FEATURES, X.T)))
+        else:
+            prob = np.full(len(X), np.nan)
+        # Solo las filas fuera de la grilla van al modelo, una llamada por bloque
+        faltantes = np.flatnonzero(np.isnan(prob))
+        for inicio in range(0, len(faltantes), chunksize):
+            filas = faltantes[inicio:inicio + chunksize]
+            prob[filas] = modelo_ml.predict_proba(X[filas])[:, 1]
+        nivel = np.select([prob >= UMBRAL_ALTO, prob >= UMBRAL_MEDIO], ["Alto", "Medio"], "Bajo")
+        prob = _redondear_como_python(prob)
+    else:
+        alto = (asistencia < 85) & (promedio < 5.0)
+        medio = (asistencia < 90) | (promedio < 5.3)
+        nivel = np.select([alto, medio], ["Alto", "Medio"], "Bajo")
+        prob = np.select([alto, medio], [0.85, 0.55], 0.25)
+
+    return pd.DataFrame({"nivel": nivel, "probabilidad": prob}, index=index)
+
+
+def construir_grilla(ruta: str = GRILLA_PATH) -> GrillaRiesgo:
+    """
+    Precalcula P(riesgo) del modelo actual en toda la grilla EJES_RIESGO, con los ejes
+    en el orden de sus features (~260 mil celdas), y la activa para predecir_riesgo
+    y predecir_riesgo_lote.
+    """
+    global grilla
+    if modelo_ml is None:
+        raise RuntimeError("No hay modelo entrenado para precalcular la grilla.")
+    nueva = GrillaRiesgo.construir(modelo_ml, ejes_para(FEATURES),
+                                   modelo_sha256=huella_modelo(modelo_origen) if modelo_origen else None)
+    nueva.guardar(ruta)
+    grilla = GrillaRiesgo.cargar(ruta)
+    print(f"💾 Grilla de riesgo guardada en {ruta} ({nueva.proba.size} celdas)")
+    return grilla
+
+
+def _redondear_como_python(x: np.ndarray) -> np.ndarray:
+    """
+    np.round(x, 2) puede diferir de round(x, 2) en los casos de empate aparente
+    (x*100 ≈ n.5). Esos pocos casos se recalculan con round() para igualar a predecir_riesgo.
+    """
+    r = np.round(x, 2)
+    escalado = x * 100
+    dudosos = np.flatnonzero(np.abs(escalado - np.floor(escalado) - 0.5) < 1e-6)
+    for i in dudosos:
+        r[i] = round(float(x[i]), 2)
+    return r
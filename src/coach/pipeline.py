@@ -3,17 +3,26 @@ pipeline.py — Flujo principal del Coach híbrido ML + LLM + RAG
 """
 
 from dataclasses import dataclass
-from openai import OpenAI
-from src.coach.rag import LocalRAG
+from typing import Iterator
+from src.openaiclient import get_client
+from src.llm_cache import clave_llm, completar, get_llm_cache
+from src.singleflight import SingleFlight
+from src.coach.rag import get_rag
 from src.coach.prompt import PROMPT_TEMPLATE
 from src.coach.derivacion import evaluar_derivacion
 from dotenv import load_dotenv
-import os
 
 
 # --- 0. Cargar variables de entorno (.env)
 load_dotenv()
 
+# Presupuesto de tokens para el contexto RAG del prompt
+CONTEXT_TOKENS = 600
+MODELO_COACH = "gpt-4o-mini"
+
+# Solicitudes idénticas simultáneas comparten una sola generación
+planes_en_vuelo = SingleFlight()
+
 
 @dataclass
 class PerfilAlumno:
@@ -23,15 +32,15 @@ class PerfilAlumno:
     genero: int
 
 
-def coach_plan(perfil: PerfilAlumno, verbose: bool = False) -> dict:
+def preparar_prompt(perfil: PerfilAlumno) -> tuple:
     """
-    Genera un plan personalizado combinando RAG + LLM + reglas locales.
+    Recupera el contexto RAG y arma el prompt del perfil.
+    Retorna (prompt, hits) para que las variantes del pipeline compartan esta lógica.
     """
-    # 1. Preparar RAG
-    rag = LocalRAG("kb")
-    rag.load_kb()
-    rag.build()
-    contexto = rag.format_context(rag.retrieve("plan educativo", top_k=3))
+    # 1. Preparar RAG (índice persistido y compartido por proceso)
+    rag = get_rag("kb")
+    hits = rag.select_context(rag.retrieve("plan educativo", top_k=8), max_tokens=CONTEXT_TOKENS)
+    contexto = rag.format_context(hits)
 
     # 2. Preparar prompt
     prompt = PROMPT_TEMPLATE.format(
@@ -41,20 +50,23 @@ def coach_plan(perfil: PerfilAlumno, verbose: bool = False) -> dict:
         edad=perfil.edad,
         genero="Masculino" if perfil.genero == 1 else "Femenino"
     )
+    return prompt, hits
+
 
-    # 3. Ejecutar LLM (usa la API key del archivo .env)
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
+def parametros_llm(prompt: str) -> dict:
+    """Argumentos de chat.completions.create para el coach"""
+    return {
+        "model": MODELO_COACH,
+        "messages": [
             {"role": "system", "content": "Eres un tutor educativo empático y analítico."},
             {"role": "user", "content": prompt}
         ],
-        temperature=0.7,
-    )
+        "temperature": 0.7,
+    }
 
-    plan_text = response.choices[0].message.content
 
+def armar_resultado(perfil: PerfilAlumno, plan_text: str, hits, verbose: bool = False) -> dict:
+    """Agrega la derivación local y arma la estructura de respuesta"""
     # 4. Evaluar derivación local
     derivar, motivo = evaluar_derivacion(perfil.asistencia, perfil.promedio)
 
@@ -65,7 +77,85 @@ def coach_plan(perfil: PerfilAlumno, verbose: bool = False) -> dict:
     # 5. Retornar estructura completa
     return {
         "plan": plan_text,
-        "fuentes": [d.title for d, _ in rag.retrieve("plan educativo", top_k=3)],
+        "fuentes": list(dict.fromkeys(d.title for d, _ in hits)),
         "guardrail_derivacion": derivar,
         "motivo_derivacion": motivo
     }
+
+
+def coach_plan(perfil: PerfilAlumno, verbose: bool = False, usar_cache: bool = True) -> dict:
+    """
+    Genera un plan personalizado combinando RAG + LLM + reglas locales.
+    Con usar_cache, un prompt idéntico (mismo perfil, contexto y plantilla) reutiliza
+    la respuesta guardada en src/llm_cache en vez de llamar al LLM.
+    Si ya hay una generación en curso para el mismo prompt, se espera su resultado.
+    """
+    prompt, hits = preparar_prompt(perfil)
+    params = parametros_llm(prompt)
+
+    # 3. Ejecutar LLM (cliente compartido con keep-alive; API key del archivo .env)
+    client = get_client()
+    plan_text = planes_en_vuelo.do(
+        clave_llm(client.base_url, **params),
+        lambda: completar(client, usar_cache=usar_cache, **params),
+    )
+
+    return armar_resultado(perfil, plan_text, hits, verbose)
+
+
+class PlanStream:
+    """
+    Plan en streaming: al iterar entrega los fragmentos de texto a medida que llegan
+    del LLM. Cuando la iteración termina, .resultado tiene el mismo dict que coach_plan.
+    Una respuesta en cache se entrega completa en un solo fragmento, y también la de una
+    generación idéntica ya en curso (coach_plan o otro PlanStream): se espera su texto.
+    """
+
+    def __init__(self, perfil: PerfilAlumno, verbose: bool = False, usar_cache: bool = True):
+        self.perfil = perfil
+        self.verbose = verbose
+        self.usar_cache = usar_cache
+        self.prompt, self.hits = preparar_prompt(perfil)
+        self.params = parametros_llm(self.prompt)
+        self.resultado = None
+
+    def __iter__(self) -> Iterator[str]:
+        client = get_client()
+        cache = get_llm_cache() if self.usar_cache else None
+        clave = clave_llm(client.base_url, **self.params)  # misma clave que coach_plan: comparten cache
+        plan_text = cache.get(clave) if cache is not None else None
+
+        if plan_text is None:
+            futuro, lider = planes_en_vuelo.unirse(clave)
+            if lider:
+                try:
+                    partes = []
+                    stream = client.chat.completions.create(**self.params, stream=True)
+                    for chunk in stream:
+                        if not chunk.choices:
+                            continue
+                        delta = chunk.choices[0].delta.content
+                        if delta:
+                            partes.append(delta)
+                            yield delta
+                    plan_text = "".join(partes)
+                    if cache is not None:
+                        cache.set(clave, plan_text)
+                except BaseException as e:
+                    if isinstance(e, GeneratorExit):  # se dejó de iterar a mitad del plan
+                        e = RuntimeError("La generación en streaming se interrumpió.")
+                    planes_en_vuelo.terminar(clave, futuro, error=e)
+                    raise
+                planes_en_vuelo.terminar(clave, futuro, plan_text)
+            else:
+                plan_text = futuro.result()
+                yield plan_text
+        else:
+            yield plan_text
+
+        self.resultado = armar_resultado(self.perfil, plan_text, self.hits, self.verbose)
+
+
+def coach_plan_stream(perfil: PerfilAlumno, verbose: bool = False, usar_cache: bool = True) -> PlanStream:
+    """Variante de coach_plan que entrega el plan token a token (ver PlanStream)."""
+    return PlanStream(perfil, verbose=verbose, usar_cache=usar_cache)
@@ -0,0 +1,115 @@
+"""
+pipeline_async.py — Versión asyncio del Coach para generar planes en lote.
+
+coach_plan_bulk ejecuta muchos perfiles en paralelo con:
+- un semáforo (máximo de requests simultáneos al LLM),
+- un limitador de tokens por minuto (token bucket),
+- el índice RAG compartido del proceso y un AsyncOpenAI con pool keep-alive.
+Los resultados vuelven en el mismo orden que los perfiles de entrada.
+"""
+
+import asyncio
+import time
+from typing import List, Optional, Sequence
+
+from src.openaiclient import get_async_client
+from src.llm_cache import clave_llm, get_llm_cache
+from src.coach.pipeline import PerfilAlumno, preparar_prompt, parametros_llm, armar_resultado
+from src.coach.tokens import contar_tokens
+from src.singleflight import AsyncSingleFlight
+
+# Tokens de salida que se reservan por plan antes de conocer el uso real
+TOKENS_SALIDA_ESTIMADOS = 800
+
+# Perfiles repetidos dentro de un lote (o lotes simultáneos) comparten la generación
+planes_en_vuelo_async = AsyncSingleFlight()
+
+
+class LimitadorTPM:
+    """Token bucket: como máximo tokens_por_minuto tokens consumidos en cualquier ventana de 60 s."""
+
+    def __init__(self, tokens_por_minuto: int):
+        self.capacidad = float(tokens_por_minuto)
+        self.tasa = tokens_por_minuto / 60.0  # tokens por segundo
+        self.disponibles = self.capacidad
+        self.ultimo = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _recargar(self) -> None:
+        ahora = time.monotonic()
+        self.disponibles = min(self.capacidad, self.disponibles + (ahora - self.ultimo) * self.tasa)
+        self.ultimo = ahora
+
+    async def adquirir(self, tokens: int) -> None:
+        """Espera hasta que haya cupo para tokens (una request nunca pide más que la capacidad)."""
+        tokens = min(float(tokens), self.capacidad)
+        async with self._lock:
+            while True:
+                self._recargar()
+                if self.disponibles >= tokens:
+                    self.disponibles -= tokens
+                    return
+                await asyncio.sleep((tokens - self.disponibles) / self.tasa)
+
+    def ajustar(self, delta: int) -> None:
+        """Corrige la reserva con el uso real (delta > 0 consume más, < 0 devuelve cupo)."""
+        self._recargar()
+        self.disponibles = min(self.capacidad, self.disponibles - delta)
+
+
+async def coach_plan_async(perfil: PerfilAlumno, client=None,
+                           limitador: Optional[LimitadorTPM] = None, verbose: bool = False,
+                           usar_cache: bool = True) -> dict:
+    """Equivalente async de coach_plan (comparte la misma cache de respuestas)."""
+    prompt, hits = preparar_prompt(perfil)
+    params = parametros_llm(prompt)
+
+    client = client or get_async_client()
+    clave = clave_llm(client.base_url, **params)
+    cache = get_llm_cache() if usar_cache else None
+    guardado = cache.get(clave) if cache is not None else None
+    if guardado is not None:
+        return armar_resultado(perfil, guardado, hits, verbose)
+
+    async def generar() -> str:
+        reserva = contar_tokens(prompt) + TOKENS_SALIDA_ESTIMADOS
+        if limitador is not None:
+            await limitador.adquirir(reserva)
+
+        response = await client.chat.completions.create(**params)
+        texto = response.choices[0].message.content
+        if cache is not None and texto is not None:
+            cache.set(clave, texto)
+
+        usage = getattr(response, "usage", None)
+        if limitador is not None and usage is not None and getattr(usage, "total_tokens", None):
+            limitador.ajustar(usage.total_tokens - reserva)
+        return texto
+
+    plan_text = await planes_en_vuelo_async.do(clave, generar)
+    return armar_resultado(perfil, plan_text, hits, verbose)
+
+
+async def coach_plan_bulk(perfiles: Sequence[PerfilAlumno], max_concurrencia: int = 8,
+                          tokens_por_minuto: Optional[int] = None,
+                          return_exceptions: bool = False) -> List[dict]:
+    """
+    Genera los planes de todos los perfiles concurrentemente.
+    Con return_exceptions=True, un perfil que falla devuelve su excepción en su posición
+    en vez de cancelar el lote.
+    """
+    semaforo = asyncio.Semaphore(max_concurrencia)
+    limitador = LimitadorTPM(tokens_por_minuto) if tokens_por_minuto else None
+    client = get_async_client()
+
+    async def uno(perfil: PerfilAlumno) -> dict:
+        async with semaforo:
+            return await coach_plan_async(perfil, client=client, limitador=limitador)
+
+    # gather conserva el orden de entrada
+    return await asyncio.gather(*(uno(p) for p in perfiles), return_exceptions=return_exceptions)
+
+
+def coach_plan_lote(perfiles: Sequence[PerfilAlumno], **kwargs) -> List[dict]:
+    """Punto de entrada síncrono (scripts, jobs) para coach_plan_bulk."""
+    return asyncio.run(coach_plan_bulk(perfiles, **kwargs))
@@ -1,18 +1,41 @@
 """
 RAG local: indexa .md de /kb y recupera pasajes relevantes.
 Usa TF-IDF + similitud coseno (ligero y sin dependencias externas pesadas).
+
+El índice (vocabulario, idf y matriz dispersa) se guarda en disco y se recarga con
+memory-map; solo se reconstruye cuando cambia algún archivo de la KB (mtime + hash).
+Cada construcción va a una subcarpeta nueva de index_dir y meta.json apunta a la
+vigente (se reemplaza de forma atómica): los arreglos que otro LocalRAG o proceso
+tenga mapeados nunca se sobrescriben ni se truncan.
+
+Motores de recuperación (engine): "tfidf" (coseno, por defecto), "bm25" (índice
+invertido) y "faiss" (LSA + FAISS). Ver src/coach/retrieval.py.
+
+La KB se indexa por pasajes (bloques de ~passage_tokens bajo su encabezado) y el
+contexto se arma respetando un presupuesto de tokens, sin pasajes duplicados.
 """
 
 import os
 import glob
-from dataclasses import dataclass
-from typing import List, Tuple
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+import threading
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Tuple
 
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
-import nltk
-from nltk.corpus import stopwords
+
+from src.coach.retrieval import BM25Index, LSAFaissIndex, top_k as _top_k
+from src.coach.tokens import contar_tokens
+
+INDEX_VERSION = 3
+ENGINES = ("tfidf", "bm25", "faiss")
 
 
 @dataclass
@@ -20,61 +43,347 @@ class Doc:
     title: str
     path: str
     text: str
+    chunk: int = 0  # número de pasaje dentro del archivo
 
 
-class LocalRAG:
-    def __init__(self, kb_dir: str = "kb"):
-        self.kb_dir = kb_dir
+def split_passages(text: str, max_tokens: int) -> List[str]:
+    """
+    Divide un .md en pasajes de hasta max_tokens, cortando entre líneas.
+    Cada pasaje lleva el encabezado (#) bajo el que aparece, para no perder contexto.
+    """
+    pasajes: List[str] = []
+    encabezado = ""
+    buffer: List[str] = []
 
-        # 🧠 Descargar stopwords si no están disponibles
-        try:
-            nltk.data.find('corpora/stopwords')
-        except LookupError:
-            nltk.download('stopwords')
+    def cerrar():
+        if buffer:
+            cuerpo = "\n".join(buffer).strip()
+            if cuerpo:
+                pasajes.append(f"{encabezado}\n{cuerpo}" if encabezado else cuerpo)
+            buffer.clear()
 
-        # Lista de stopwords en español
-        stop_words_es = stopwords.words('spanish')
+    for linea in text.splitlines():
+        if linea.lstrip().startswith("#"):
+            cerrar()
+            encabezado = linea.strip()
+            continue
+        if not linea.strip():
+            continue
+        # Líneas más largas que el presupuesto se parten por palabras
+        piezas = [linea]
+        if contar_tokens(linea) > max_tokens:
+            palabras, piezas, actual = linea.split(), [], []
+            for w in palabras:
+                if actual and contar_tokens(" ".join(actual + [w])) > max_tokens:
+                    piezas.append(" ".join(actual))
+                    actual = []
+                actual.append(w)
+            if actual:
+                piezas.append(" ".join(actual))
+        for pieza in piezas:
+            if buffer and contar_tokens("\n".join(buffer + [pieza])) > max_tokens:
+                cerrar()
+            buffer.append(pieza)
+    cerrar()
+    return pasajes
 
-        # 🧩 Vectorizador TF-IDF optimizado para español
-        self.vectorizer = TfidfVectorizer(
-            lowercase=True,
-            stop_words=stop_words_es,  # Usa stopwords en español
-            ngram_range=(1, 2)
-        )
 
+def _stopwords_es() -> List[str]:
+    """Stopwords en español de NLTK (se descargan solo si faltan)."""
+    import nltk
+    from nltk.corpus import stopwords
+
+    # 🧠 Descargar stopwords si no están disponibles
+    try:
+        nltk.data.find('corpora/stopwords')
+    except LookupError:
+        nltk.download('stopwords')
+    return stopwords.words('spanish')
+
+
+def _crear_vectorizer(stop_words: List[str]) -> TfidfVectorizer:
+    # 🧩 Vectorizador TF-IDF optimizado para español
+    return TfidfVectorizer(
+        lowercase=True,
+        stop_words=stop_words,  # Usa stopwords en español
+        ngram_range=(1, 2)
+    )
+
+
+def _sha256(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+class LocalRAG:
+    def __init__(self, kb_dir: str = "kb", index_dir: Optional[str] = None, engine: str = "tfidf",
+                 passage_tokens: Optional[int] = 120):
+        if engine not in ENGINES:
+            raise ValueError(f"engine debe ser uno de {ENGINES}")
+        self.kb_dir = kb_dir
+        self.index_dir = index_dir or os.path.join(kb_dir, ".index")
+        self.engine = engine
+        self.passage_tokens = passage_tokens  # None = un documento completo por unidad
+        self.vectorizer: Optional[TfidfVectorizer] = None
         self.docs: List[Doc] = []
         self.matrix = None
+        self.bm25: Optional[BM25Index] = None
+        self.ann: Optional[LSAFaissIndex] = None
+        self.manifest: Dict[str, dict] = {}
+        self.build_dir: Optional[str] = None  # subcarpeta de index_dir con los arreglos cargados
+
+    def _kb_paths(self) -> List[str]:
+        return sorted(glob.glob(os.path.join(self.kb_dir, "*.md")))
 
     def load_kb(self) -> None:
-        """Carga todos los archivos .md de la carpeta KB"""
-        paths = glob.glob(os.path.join(self.kb_dir, "*.md"))
+        """Carga todos los archivos .md de la carpeta KB (divididos en pasajes si passage_tokens)"""
+        paths = self._kb_paths()
         self.docs = []
         for p in paths:
             with open(p, "r", encoding="utf-8") as f:
                 txt = f.read()
             title = os.path.splitext(os.path.basename(p))[0]
-            self.docs.append(Doc(title=title, path=p, text=txt))
+            if self.passage_tokens is None:
+                self.docs.append(Doc(title=title, path=p, text=txt))
+                continue
+            for i, pasaje in enumerate(split_passages(txt, self.passage_tokens)):
+                self.docs.append(Doc(title=title, path=p, text=pasaje, chunk=i))
         if not self.docs:
             raise RuntimeError(f"No se encontraron archivos .md en {self.kb_dir}")
 
     def build(self) -> None:
         """Crea la matriz TF-IDF del corpus"""
+        self.vectorizer = _crear_vectorizer(_stopwords_es())
         corpus = [d.text for d in self.docs]
-        self.matrix = self.vectorizer.fit_transform(corpus)
+        self.matrix = self.vectorizer.fit_transform(corpus).tocsr()
+        if self.engine == "bm25":
+            self.bm25 = BM25Index().fit(self._conteos(corpus))
+        elif self.engine == "faiss":
+            self.ann = LSAFaissIndex().fit(self.matrix)
+        self.manifest = {
+            d.path: {"mtime_ns": os.stat(d.path).st_mtime_ns, "sha256": _sha256(d.path)}
+            for d in self.docs
+        }
+
+    def _conteos(self, textos: List[str]):
+        """Conteos crudos con el mismo análisis y vocabulario que el TF-IDF (para BM25)"""
+        contador = CountVectorizer(
+            lowercase=True,
+            stop_words=self.vectorizer.stop_words,
+            ngram_range=self.vectorizer.ngram_range,
+            vocabulary=self.vectorizer.vocabulary_,
+        )
+        return contador.transform(textos)
+
+    # -----------------------------
+    # Persistencia del índice
+    # -----------------------------
+    def save(self) -> None:
+        """
+        Guarda vocabulario, idf, stopwords, documentos y matriz CSR en una subcarpeta
+        nueva de index_dir y luego cambia meta.json para que apunte a ella. Los motores
+        de la construcción vigente que esta instancia no usa se conservan si esa
+        construcción es del mismo corpus (ver _heredar_motores).
+        """
+        os.makedirs(self.index_dir, exist_ok=True)
+        meta_path = os.path.join(self.index_dir, "meta.json")
+        previo = self._leer_meta(meta_path)
+        # Nombre ordenable por fecha de creación (ver _limpiar_builds)
+        build_dir = tempfile.mkdtemp(prefix=f"build-{time.time_ns():020d}-", dir=self.index_dir)
+        np.save(os.path.join(build_dir, "data.npy"), self.matrix.data)
+        np.save(os.path.join(build_dir, "indices.npy"), self.matrix.indices)
+        np.save(os.path.join(build_dir, "indptr.npy"), self.matrix.indptr)
+        np.save(os.path.join(build_dir, "idf.npy"), self.vectorizer.idf_)
+        if self.bm25 is not None:
+            self.bm25.save(build_dir)
+        if self.ann is not None:
+            self.ann.save(build_dir)
+        heredados = self._heredar_motores(previo, build_dir)
+        meta = {
+            "version": INDEX_VERSION,
+            "build": os.path.basename(build_dir),
+            "engines": ["tfidf"] + [m for m in ("bm25", "faiss") if m in heredados
+                                    or (self.bm25 if m == "bm25" else self.ann) is not None],
+            "passage_tokens": self.passage_tokens,
+            "shape": list(self.matrix.shape),
+            "vocabulary": {t: int(i) for t, i in self.vectorizer.vocabulary_.items()},
+            "stop_words": sorted(self.vectorizer.stop_words),
+            "docs": [asdict(d) for d in self.docs],
+            "manifest": self.manifest,
+        }
+        # El meta se escribe al final: un índice a medio guardar no queda como válido
+        fd, tmp = tempfile.mkstemp(prefix="meta-", suffix=".tmp", dir=self.index_dir)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp, meta_path)
+        self.build_dir = build_dir
+        if previo is not None and previo.get("build"):
+            self._limpiar_builds(previo["build"])
+
+    @staticmethod
+    def _leer_meta(meta_path: str) -> Optional[dict]:
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _heredar_motores(self, previo: Optional[dict], build_dir: str) -> List[str]:
+        """
+        Copia a build_dir los motores (bm25/faiss) de la construcción vigente que esta
+        instancia no calculó, si esa construcción indexa el mismo corpus (mismos
+        archivos, contenido, pasajes y forma de la matriz). Así procesos con motores
+        distintos sobre la misma KB no se pisan el índice en cada reconstrucción.
+        """
+        if (previo is None or previo.get("version") != INDEX_VERSION
+                or previo.get("passage_tokens") != self.passage_tokens
+                or previo.get("shape") != list(self.matrix.shape)
+                or {p: m["sha256"] for p, m in previo.get("manifest", {}).items()}
+                != {p: m["sha256"] for p, m in self.manifest.items()}):
+            return []
+        origen = os.path.join(self.index_dir, previo["build"])
+        heredados = []
+        for motor, clase, propio in (("bm25", BM25Index, self.bm25), ("faiss", LSAFaissIndex, self.ann)):
+            if propio is not None or motor not in previo.get("engines", []):
+                continue
+            try:
+                clase.load(origen).save(build_dir)
+            except (OSError, ImportError):
+                continue  # construcción ya limpiada o faiss no instalado: el motor se omite
+            heredados.append(motor)
+        return heredados
+
+    def _limpiar_builds(self, anterior: str) -> None:
+        """
+        Borra las construcciones más antiguas que la recién reemplazada. Esa se conserva
+        para quien haya leído el meta anterior y aún no abra sus arreglos; las ya mapeadas
+        siguen siendo legibles tras borrarlas (POSIX) y en Windows el borrado falla sin error.
+        """
+        for nombre in os.listdir(self.index_dir):
+            if nombre.startswith("build-") and nombre < anterior:
+                shutil.rmtree(os.path.join(self.index_dir, nombre), ignore_errors=True)
+
+    def load(self) -> bool:
+        """Carga el índice guardado (matriz con memory-map). Retorna False si no existe."""
+        meta_path = os.path.join(self.index_dir, "meta.json")
+        if not os.path.exists(meta_path):
+            return False
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if (meta.get("version") != INDEX_VERSION
+                or self.engine not in meta.get("engines", [])
+                or meta.get("passage_tokens") != self.passage_tokens):
+            return False
+
+        build_dir = os.path.join(self.index_dir, meta["build"])
+        cargar = lambda nombre: np.load(os.path.join(build_dir, nombre), mmap_mode="r")
+        try:
+            matrix = sp.csr_matrix(
+                (cargar("data.npy"), cargar("indices.npy"), cargar("indptr.npy")),
+                shape=tuple(meta["shape"]),
+            )
+            idf = np.load(os.path.join(build_dir, "idf.npy"))
+            bm25 = BM25Index.load(build_dir) if self.engine == "bm25" else None
+            ann = LSAFaissIndex.load(build_dir) if self.engine == "faiss" else None
+        except FileNotFoundError:
+            # Construcción ya limpiada por otro proceso: se trata como índice ausente
+            return False
+
+        self.matrix, self.bm25, self.ann, self.build_dir = matrix, bm25, ann, build_dir
+        # Vectorizador ya "ajustado" sin refit ni descarga de stopwords
+        self.vectorizer = _crear_vectorizer(meta["stop_words"])
+        self.vectorizer.vocabulary_ = meta["vocabulary"]
+        self.vectorizer.idf_ = idf
+        self.docs = [Doc(**d) for d in meta["docs"]]
+        self.manifest = meta["manifest"]
+        return True
+
+    def is_stale(self) -> bool:
+        """True si se agregó, eliminó o modificó algún .md desde que se construyó el índice"""
+        paths = self._kb_paths()
+        if set(paths) != set(self.manifest):
+            return True
+        for p in paths:
+            previo = self.manifest[p]
+            mtime = os.stat(p).st_mtime_ns
+            if mtime == previo["mtime_ns"]:
+                continue
+            # Cambió el mtime: solo es cambio real si cambió el contenido
+            if _sha256(p) != previo["sha256"]:
+                return True
+            previo["mtime_ns"] = mtime
+        return False
+
+    def load_or_build(self) -> "LocalRAG":
+        """Usa el índice en disco si está vigente; si no, reindexa la KB y lo guarda"""
+        if not (self.load() and not self.is_stale()):
+            self.load_kb()
+            self.build()
+            self.save()
+        return self
 
     def retrieve(self, query: str, top_k: int = 3) -> List[Tuple[Doc, float]]:
-        """Recupera los documentos más relevantes según la similitud coseno"""
+        """Recupera los documentos más relevantes según el motor configurado"""
         if self.matrix is None:
             raise RuntimeError("RAG no indexado. Llama a load_kb() y build().")
-        q_vec = self.vectorizer.transform([query])
-        sims = cosine_similarity(q_vec, self.matrix).ravel()
-        idx = np.argsort(-sims)[:top_k]
-        return [(self.docs[i], float(sims[i])) for i in idx]
+        if self.engine == "bm25":
+            idx, scores = self.bm25.search(self._conteos([query]), top_k)
+        elif self.engine == "faiss":
+            idx, scores = self.ann.search(self.vectorizer.transform([query]), top_k)
+        else:
+            q_vec = self.vectorizer.transform([query])
+            sims = cosine_similarity(q_vec, self.matrix).ravel()
+            idx = _top_k(sims, top_k)
+            scores = sims[idx]
+        return [(self.docs[i], float(s)) for i, s in zip(idx, scores)]
 
     @staticmethod
-    def format_context(hits: List[Tuple[Doc, float]]) -> str:
-        """Formatea los resultados para usarlos como contexto del LLM"""
-        lines = []
+    def select_context(hits: List[Tuple[Doc, float]], max_tokens: Optional[int] = None
+                       ) -> List[Tuple[Doc, float]]:
+        """
+        Elige pasajes en orden de relevancia sin repetir contenido y sin pasar
+        max_tokens (contados con tiktoken, incluyendo el encabezado de cada pasaje).
+        """
+        elegidos, vistos, usados = [], set(), 0
         for doc, score in hits:
-            lines.append(f"# {doc.title} (score={score:.2f})\n{doc.text.strip()}\n")
+            clave = " ".join(doc.text.lower().split())
+            if clave in vistos:
+                continue
+            costo = contar_tokens(LocalRAG._format_hit(doc, score))
+            if max_tokens is not None and usados + costo > max_tokens:
+                continue
+            vistos.add(clave)
+            elegidos.append((doc, score))
+            usados += costo
+        return elegidos
+
+    @staticmethod
+    def _format_hit(doc: Doc, score: float) -> str:
+        return f"# {doc.title} (score={score:.2f})\n{doc.text.strip()}\n"
+
+    @staticmethod
+    def format_context(hits: List[Tuple[Doc, float]], max_tokens: Optional[int] = None) -> str:
+        """Formatea los resultados para usarlos como contexto del LLM (opcionalmente con presupuesto)"""
+        if max_tokens is not None:
+            hits = LocalRAG.select_context(hits, max_tokens)
+        lines = [LocalRAG._format_hit(doc, score) for doc, score in hits]
         return "\n\n".join(lines)
+
+
+# Índices compartidos por proceso (uno por carpeta KB y motor)
+_RAG_CACHE: Dict[Tuple[str, str], LocalRAG] = {}
+_RAG_LOCK = threading.Lock()
+
+
+def get_rag(kb_dir: str = "kb", engine: str = "tfidf") -> LocalRAG:
+    """
+    Devuelve el índice de kb_dir listo para consultar, reutilizándolo entre llamadas.
+    Solo revisa mtimes de la KB; reindexa si algún archivo cambió (en una construcción
+    nueva: quien aún tenga el índice anterior puede seguir consultándolo).
+    """
+    with _RAG_LOCK:
+        rag = _RAG_CACHE.get((kb_dir, engine))
+        if rag is None or rag.is_stale():
+            rag = LocalRAG(kb_dir, engine=engine).load_or_build()
+            _RAG_CACHE[(kb_dir, engine)] = rag
+        return rag
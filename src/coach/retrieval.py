@@ -0,0 +1,201 @@
+"""
+retrieval.py — Motores de recuperación escalables para el RAG local.
+
+- BM25Index: BM25 sobre un índice invertido disperso (término → documentos).
+  El costo de una consulta depende de los postings de sus términos, no del tamaño de la KB.
+- LSAFaissIndex: vectores LSA (TruncatedSVD sobre la matriz TF-IDF) calculados localmente
+  e indexados con FAISS (HNSW aproximado para KB grandes, exacto para KB pequeñas).
+- top_k: selección de los k mejores con argpartition (O(n) en vez de ordenar todo).
+
+Benchmark de latencia por consulta:  python -m src.coach.retrieval
+"""
+
+import os
+import time
+from typing import Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Índices de los k puntajes más altos, ordenados de mayor a menor."""
+    n = len(scores)
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if k < n:
+        idx = np.argpartition(-scores, k - 1)[:k]
+    else:
+        idx = np.arange(n)
+    return idx[np.argsort(-scores[idx], kind="stable")]
+
+
+class BM25Index:
+    """BM25 (Okapi) con pesos precalculados por (término, documento) en formato CSC."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.weights = None  # CSC: columnas = términos (índice invertido)
+
+    def fit(self, tf: sp.spmatrix) -> "BM25Index":
+        """tf: matriz documentos × términos con conteos crudos."""
+        tf = sp.csr_matrix(tf, dtype=np.float32, copy=True)
+        n_docs = tf.shape[0]
+        largo = np.asarray(tf.sum(axis=1)).ravel()
+        largo_medio = largo.mean() if n_docs and largo.mean() > 0 else 1.0
+
+        df = np.bincount(tf.indices, minlength=tf.shape[1])
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+        filas = np.repeat(np.arange(n_docs), np.diff(tf.indptr))
+        norma = self.k1 * (1 - self.b + self.b * largo[filas] / largo_medio)
+        tf.data = idf[tf.indices] * tf.data * (self.k1 + 1) / (tf.data + norma)
+        self.weights = tf.tocsc()
+        return self
+
+    def scores(self, q: sp.spmatrix) -> np.ndarray:
+        """Puntaje BM25 de todos los documentos para una consulta (vector de conteos 1 × términos)."""
+        q = sp.csr_matrix(q)
+        w = self.weights
+        out = np.zeros(w.shape[0], dtype=np.float32)
+        for t, qtf in zip(q.indices, q.data):
+            ini, fin = w.indptr[t], w.indptr[t + 1]
+            out[w.indices[ini:fin]] += qtf * w.data[ini:fin]
+        return out
+
+    def search(self, q: sp.spmatrix, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        s = self.scores(q)
+        idx = top_k(s, k)
+        return idx, s[idx]
+
+    def save(self, index_dir: str) -> None:
+        w = self.weights
+        np.save(os.path.join(index_dir, "bm25_data.npy"), w.data)
+        np.save(os.path.join(index_dir, "bm25_indices.npy"), w.indices)
+        np.save(os.path.join(index_dir, "bm25_indptr.npy"), w.indptr)
+        np.save(os.path.join(index_dir, "bm25_shape.npy"), np.array(w.shape))
+
+    @classmethod
+    def load(cls, index_dir: str) -> "BM25Index":
+        cargar = lambda nombre: np.load(os.path.join(index_dir, nombre), mmap_mode="r")
+        idx = cls()
+        idx.weights = sp.csc_matrix(
+            (cargar("bm25_data.npy"), cargar("bm25_indices.npy"), cargar("bm25_indptr.npy")),
+            shape=tuple(np.load(os.path.join(index_dir, "bm25_shape.npy"))),
+        )
+        return idx
+
+
+def _importar_faiss():
+    try:
+        import faiss
+    except ImportError as e:
+        raise ImportError("El motor 'faiss' requiere faiss-cpu (pip install faiss-cpu).") from e
+    return faiss
+
+
+class LSAFaissIndex:
+    """Proyección LSA de los vectores TF-IDF + índice FAISS de producto interno (coseno)."""
+
+    def __init__(self, n_components: int = 128, hnsw_m: int = 32, umbral_hnsw: int = 10_000):
+        self.n_components = n_components
+        self.hnsw_m = hnsw_m
+        self.umbral_hnsw = umbral_hnsw
+        self.components = None  # (k × términos)
+        self.index = None
+
+    def _proyectar(self, X: sp.spmatrix) -> np.ndarray:
+        v = np.asarray(X @ self.components.T, dtype=np.float32)
+        v /= np.maximum(np.linalg.norm(v, axis=1, keepdims=True), 1e-12)
+        return np.ascontiguousarray(v)
+
+    def fit(self, tfidf: sp.spmatrix) -> "LSAFaissIndex":
+        from sklearn.decomposition import TruncatedSVD
+
+        faiss = _importar_faiss()
+        k = max(1, min(self.n_components, tfidf.shape[0] - 1, tfidf.shape[1] - 1))
+        svd = TruncatedSVD(n_components=k, random_state=42).fit(tfidf)
+        self.components = svd.components_.astype(np.float32)
+
+        vectores = self._proyectar(tfidf)
+        if tfidf.shape[0] >= self.umbral_hnsw:
+            self.index = faiss.IndexHNSWFlat(k, self.hnsw_m, faiss.METRIC_INNER_PRODUCT)
+        else:
+            # Con pocas decenas de miles de vectores la búsqueda exacta ya es rápida
+            self.index = faiss.IndexFlatIP(k)
+        self.index.add(vectores)
+        return self
+
+    def search(self, q_tfidf: sp.spmatrix, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        k = min(k, self.index.ntotal)
+        D, I = self.index.search(self._proyectar(q_tfidf), k)
+        validos = I[0] >= 0
+        return I[0][validos], D[0][validos]
+
+    def save(self, index_dir: str) -> None:
+        faiss = _importar_faiss()
+        np.save(os.path.join(index_dir, "lsa_components.npy"), self.components)
+        faiss.write_index(self.index, os.path.join(index_dir, "faiss.index"))
+
+    @classmethod
+    def load(cls, index_dir: str) -> "LSAFaissIndex":
+        faiss = _importar_faiss()
+        idx = cls()
+        idx.components = np.load(os.path.join(index_dir, "lsa_components.npy"), mmap_mode="r")
+        idx.index = faiss.read_index(os.path.join(index_dir, "faiss.index"), faiss.IO_FLAG_MMAP)
+        return idx
+
+
+# -----------------------------
+# Benchmark de latencia
+# -----------------------------
+def _corpus_sintetico(n_docs: int, seed: int = 0):
+    """Documentos tipo 'protocolo escolar' generados a partir de un vocabulario Zipf."""
+    rng = np.random.default_rng(seed)
+    vocab = np.array([f"termino{i}" for i in range(20_000)])
+    pesos = 1.0 / np.arange(1, len(vocab) + 1)
+    pesos /= pesos.sum()
+    largos = rng.integers(80, 400, n_docs)
+    return [" ".join(rng.choice(vocab, size=l, p=pesos)) for l in largos]
+
+
+def benchmark(tamanos=(1_000, 5_000, 20_000), n_consultas: int = 50, top: int = 3) -> None:
+    """Latencia media por consulta de cada motor a medida que crece la cantidad de documentos."""
+    from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
+    from sklearn.metrics.pairwise import cosine_similarity
+
+    try:
+        _importar_faiss()
+        con_faiss = True
+    except ImportError:
+        con_faiss = False
+
+    print(f"{'docs':>8} | {'tfidf argsort':>14} | {'tfidf argpart':>14} | {'bm25':>10} | {'faiss lsa':>10}  (ms/consulta)")
+    for n in tamanos:
+        corpus = _corpus_sintetico(n)
+        consultas = _corpus_sintetico(n_consultas, seed=1)
+        consultas = [" ".join(c.split()[:6]) for c in consultas]
+
+        tfidf_vec = TfidfVectorizer()
+        tfidf = tfidf_vec.fit_transform(corpus)
+        count_vec = CountVectorizer(vocabulary=tfidf_vec.vocabulary_)
+        bm25 = BM25Index().fit(count_vec.transform(corpus))
+        lsa = LSAFaissIndex(n_components=128).fit(tfidf) if con_faiss else None
+
+        def medir(fn):
+            t0 = time.perf_counter()
+            for c in consultas:
+                fn(c)
+            return (time.perf_counter() - t0) * 1000 / len(consultas)
+
+        t_sort = medir(lambda c: np.argsort(-cosine_similarity(tfidf_vec.transform([c]), tfidf).ravel())[:top])
+        t_part = medir(lambda c: top_k((tfidf @ tfidf_vec.transform([c]).T).toarray().ravel(), top))
+        t_bm25 = medir(lambda c: bm25.search(count_vec.transform([c]), top))
+        t_faiss = medir(lambda c: lsa.search(tfidf_vec.transform([c]), top)) if con_faiss else float("nan")
+        print(f"{n:>8} | {t_sort:>14.3f} | {t_part:>14.3f} | {t_bm25:>10.3f} | {t_faiss:>10.3f}")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,107 @@
+"""
+scorer.py — Scorer lineal sin dependencias (solo NumPy) para servir el modelo de riesgo.
+
+El Pipeline(StandardScaler, LogisticRegression) se "pliega" en un único vector de
+coeficientes + intercepto y se guarda en un JSON versionado. Así los procesos que
+solo predicen no necesitan importar scikit-learn ni joblib.
+"""
+
+import json
+import numpy as np
+
+FORMATO_VERSION = 1
+
+# Feature del modelo → argumento de modelo_riesgo.predecir_riesgo que la alimenta
+ENTRADAS_RIESGO = {
+    "PROM_GRAL": "promedio",
+    "ASISTENCIA": "asistencia",
+    "GEN_ALU": "genero",
+    "EDAD_ALU": "edad",
+}
+# Orden con que entrena src.model (FEATURES); se asume si el modelo no guarda nombres
+FEATURES_RIESGO = ["PROM_GRAL", "ASISTENCIA", "GEN_ALU", "EDAD_ALU"]
+
+
+def features_de(modelo):
+    """
+    Nombres de las columnas que espera el modelo, en orden: features del ScorerLineal,
+    feature_names_in_ (sklearn / XGBClassifier) o los del booster. None si no los guarda.
+    """
+    nombres = getattr(modelo, "features", None)
+    if nombres is None:
+        nombres = getattr(modelo, "feature_names_in_", None)
+    if nombres is None and hasattr(modelo, "get_booster"):
+        nombres = modelo.get_booster().feature_names
+    return [str(n) for n in nombres] if nombres is not None else None
+
+
+def validar_features(features) -> list:
+    """Verifica que modelo_riesgo sepa construir cada feature; retorna la lista."""
+    if not features:
+        raise ValueError("El modelo no indica sus features; entrénalo con un DataFrame o pasa features=.")
+    desconocidas = [f for f in features if f not in ENTRADAS_RIESGO]
+    if desconocidas or len(set(features)) != len(features):
+        raise ValueError(
+            f"Features {list(features)} no compatibles con modelo_riesgo "
+            f"(acepta: {', '.join(ENTRADAS_RIESGO)}, sin repetir)"
+        )
+    return list(features)
+
+
+class ScorerLineal:
+    """Regresión logística ya escalada: p = sigmoid(X @ coef + intercepto)."""
+
+    def __init__(self, coef, intercepto: float, features=None, metadata=None):
+        self.coef = np.asarray(coef, dtype=np.float64)
+        self.intercepto = float(intercepto)
+        self.features = list(features) if features is not None else None
+        self.metadata = metadata or {}
+
+    @classmethod
+    def desde_pipeline(cls, pipeline, features=None, metadata=None) -> "ScorerLineal":
+        """Pliega scaler + regresión logística: w' = w/σ, b' = b - Σ w·μ/σ."""
+        scaler = pipeline.named_steps["scaler"]
+        modelo = pipeline.named_steps["model"]
+        w = np.asarray(modelo.coef_, dtype=np.float64).ravel()
+        b = float(np.ravel(modelo.intercept_)[0])
+
+        escala = scaler.scale_ if getattr(scaler, "scale_", None) is not None else np.ones_like(w)
+        media = scaler.mean_ if getattr(scaler, "mean_", None) is not None else np.zeros_like(w)
+        coef = w / escala
+        intercepto = b - float(np.dot(coef, media))
+
+        if features is None and hasattr(pipeline, "feature_names_in_"):
+            features = list(pipeline.feature_names_in_)
+        return cls(coef, intercepto, features, metadata)
+
+    @classmethod
+    def cargar(cls, ruta: str) -> "ScorerLineal":
+        with open(ruta, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("formato") != FORMATO_VERSION:
+            raise ValueError(f"Formato de scorer no soportado: {data.get('formato')}")
+        return cls(data["coef"], data["intercepto"], data.get("features"), data.get("metadata"))
+
+    def guardar(self, ruta: str) -> None:
+        data = {
+            "formato": FORMATO_VERSION,
+            "tipo": "logistic_regression",
+            "features": self.features,
+            "coef": self.coef.tolist(),
+            "intercepto": self.intercepto,
+            "metadata": self.metadata,
+        }
+        with open(ruta, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+
+    def decision_function(self, X) -> np.ndarray:
+        return np.asarray(X, dtype=np.float64) @ self.coef + self.intercepto
+
+    def predict_proba(self, X) -> np.ndarray:
+        """Misma interfaz que sklearn: columnas [P(clase 0), P(clase 1)]."""
+        z = self.decision_function(X)
+        p1 = np.exp(-np.logaddexp(0.0, -z))  # sigmoid estable numéricamente
+        return np.column_stack([1.0 - p1, p1])
+
+    def predict(self, X) -> np.ndarray:
+        return (self.decision_function(X) > 0).astype(np.int64)
@@ -0,0 +1,112 @@
+"""
+stub_llm.py — Servidor local que imita /v1/chat/completions con latencia simulada.
+
+Sirve para verificar el pipeline (sync/async/streaming) sin API key ni costo:
+    python -m src.coach.stub_llm            # verifica coach_plan_bulk vs coach_plan en serie
+El plan devuelto repite los "Datos del estudiante" del prompt, así se puede comprobar
+que cada resultado corresponde a su perfil.
+"""
+
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _respuesta_stub(body: dict) -> str:
+    prompt = body["messages"][-1]["content"]
+    datos = re.findall(r"^- (Asistencia|Promedio general|Edad|Género): (.*)$", prompt, re.MULTILINE)
+    resumen = "; ".join(f"{k}: {v}" for k, v in datos)
+    return f"## Plan (stub)\n{resumen}\n- [ ] Acción 1\n- [ ] Acción 2"
+
+
+def crear_servidor(latencia: float = 0.5, puerto: int = 0) -> ThreadingHTTPServer:
+    """Crea (sin iniciar) el servidor stub. Cada request espera `latencia` segundos."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _json(self, status: int, payload: dict) -> None:
+            data = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            self.server.requests += 1
+            time.sleep(latencia)
+            texto = _respuesta_stub(body)
+
+            if body.get("stream"):
+                # Server-sent events, un fragmento por palabra
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                for pieza in re.findall(r"\S+\s*", texto):
+                    evento = {
+                        "id": "stub", "object": "chat.completion.chunk", "created": 0,
+                        "model": body.get("model", "stub"),
+                        "choices": [{"index": 0, "delta": {"content": pieza}, "finish_reason": None}],
+                    }
+                    self.wfile.write(f"data: {json.dumps(evento)}\n\n".encode())
+                    self.wfile.flush()
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.close_connection = True
+                return
+
+            self._json(200, {
+                "id": "stub", "object": "chat.completion", "created": 0,
+                "model": body.get("model", "stub"),
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": texto}}],
+                "usage": {"prompt_tokens": 100, "completion_tokens": 20, "total_tokens": 120},
+            })
+
+    servidor = ThreadingHTTPServer(("127.0.0.1", puerto), Handler)
+    servidor.daemon_threads = True
+    servidor.requests = 0
+    return servidor
+
+
+def iniciar_servidor(latencia: float = 0.5, puerto: int = 0) -> ThreadingHTTPServer:
+    """Inicia el stub en un hilo de fondo. La URL base es servidor.base_url."""
+    servidor = crear_servidor(latencia, puerto)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    servidor.base_url = f"http://127.0.0.1:{servidor.server_address[1]}/v1"
+    return servidor
+
+
+# Verificación: lote async vs. serie síncrona contra el stub
+if __name__ == "__main__":
+    import os
+
+    servidor = iniciar_servidor(latencia=0.5)
+    os.environ["OPENAI_BASE_URL"] = servidor.base_url
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+    # Se mide la generación: sin cache (y sin dejar planes "stub" en la cache compartida)
+    os.environ["LLM_CACHE"] = "0"
+
+    from src.coach.pipeline import PerfilAlumno, coach_plan
+    from src.coach.pipeline_async import coach_plan_lote
+
+    perfiles = [PerfilAlumno(asistencia=60 + i, promedio=4.0, edad=14, genero=1 + i % 2) for i in range(40)]
+
+    t0 = time.perf_counter()
+    serie = [coach_plan(p) for p in perfiles[:5]]
+    t_serie = (time.perf_counter() - t0) / 5 * len(perfiles)
+
+    t0 = time.perf_counter()
+    lote = coach_plan_lote(perfiles, max_concurrencia=10, tokens_por_minuto=200_000)
+    t_lote = time.perf_counter() - t0
+
+    en_orden = all(f"Asistencia: {p.asistencia}%" in r["plan"] for p, r in zip(perfiles, lote))
+    print(f"Serie (estimado, {len(perfiles)} planes): {t_serie:.1f}s | Lote async: {t_lote:.1f}s | orden correcto: {en_orden}")
+    servidor.shutdown()
@@ -0,0 +1,30 @@
+"""
+tokens.py — Conteo de tokens para presupuestar el contexto del LLM.
+
+Usa tiktoken con la codificación del modelo. Si tiktoken no está disponible
+(o no puede descargar la codificación sin red), usa la aproximación ~4 caracteres/token.
+"""
+
+from functools import lru_cache
+
+MODELO_POR_DEFECTO = "gpt-4o-mini"
+
+
+@lru_cache(maxsize=8)
+def _encoder(modelo: str):
+    try:
+        import tiktoken
+        try:
+            return tiktoken.encoding_for_model(modelo)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+def contar_tokens(texto: str, modelo: str = MODELO_POR_DEFECTO) -> int:
+    """Cantidad de tokens de texto para el modelo indicado."""
+    enc = _encoder(modelo)
+    if enc is None:
+        return max(1, len(texto) // 4) if texto else 0
+    return len(enc.encode(texto, disallowed_special=()))
@@ -0,0 +1,82 @@
+"""
+dataset.py - Dataset Arrow/Parquet particionado por año (AGNO)
+Parte del proyecto Hackathon Duoc UC 2025 (Tutor Virtual Adaptativo IA Híbrida)
+
+MINEDUC publica un CSV de rendimiento por año. construir_dataset ingiere una carpeta
+de CSV en procesos paralelos (uno por archivo) y escribe un dataset Parquet con
+particiones Hive (AGNO=2023/...). leer_dataset aplica filtros por año directamente
+sobre las particiones, sin cargar el resto en memoria.
+"""
+
+import os
+import glob
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from src.load import iterar_csv
+
+DATASET_DIR = "data/dataset"
+
+def _ingerir_archivo(ruta, destino, chunksize, compacto):
+    """Worker: lee un CSV por bloques y escribe cada bloque en su partición AGNO."""
+    base = os.path.splitext(os.path.basename(ruta))[0]
+    filas = 0
+    for i, chunk in enumerate(iterar_csv(ruta, chunksize=chunksize, compacto=compacto)):
+        if chunk.empty:
+            continue
+        pq.write_to_dataset(
+            pa.Table.from_pandas(chunk, preserve_index=False),
+            root_path=destino,
+            partition_cols=["AGNO"],
+            # Nombre único por archivo y bloque: los procesos nunca escriben el mismo fichero
+            basename_template=f"{base}-{i}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+        )
+        filas += len(chunk)
+    return ruta, filas
+
+def construir_dataset(carpeta="data/rendimiento", destino=DATASET_DIR, workers=None,
+                      chunksize=500_000, compacto=True):
+    """
+    Ingiere todos los CSV de la carpeta en paralelo y reconstruye el dataset
+    particionado por AGNO en destino. Retorna la ruta del dataset.
+    """
+    rutas = sorted(glob.glob(os.path.join(carpeta, "*.csv")))
+    if not rutas:
+        raise RuntimeError(f"❌ No se encontraron archivos .csv en {carpeta}")
+
+    if os.path.exists(destino):
+        shutil.rmtree(destino)
+    os.makedirs(destino)
+
+    workers = workers or min(len(rutas), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futuros = [pool.submit(_ingerir_archivo, r, destino, chunksize, compacto) for r in rutas]
+        for futuro in futuros:
+            ruta, filas = futuro.result()
+            print(f"✅ {os.path.basename(ruta)}: {filas} filas")
+
+    print(f"📦 Dataset particionado por AGNO en {destino} ({len(rutas)} archivos, {workers} procesos)")
+    return destino
+
+def abrir_dataset(ruta=DATASET_DIR):
+    """Abre el dataset particionado (solo metadatos, no lee filas)."""
+    return ds.dataset(ruta, format="parquet", partitioning="hive")
+
+def anios_disponibles(dataset):
+    """Años presentes según las particiones, sin leer datos."""
+    anios = set()
+    for fragmento in dataset.get_fragments():
+        claves = ds.get_partition_keys(fragmento.partition_expression)
+        if "AGNO" in claves:
+            anios.add(int(claves["AGNO"]))
+    return sorted(anios)
+
+def leer_dataset(ruta=DATASET_DIR, columnas=None, filtro=None):
+    """Lee columnas del dataset aplicando el filtro (p.ej. ds.field("AGNO") < 2024) sobre las particiones."""
+    dataset = ruta if isinstance(ruta, ds.Dataset) else abrir_dataset(ruta)
+    return dataset.to_table(columns=columnas, filter=filtro).to_pandas()
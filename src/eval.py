@@ -5,13 +5,21 @@ Hackathon Duoc UC 2025
 
 from sklearn.metrics import (
     accuracy_score, precision_score, recall_score, f1_score,
-    confusion_matrix, ConfusionMatrixDisplay, brier_score_loss
+    confusion_matrix, ConfusionMatrixDisplay, brier_score_loss, roc_auc_score
 )
 from sklearn.calibration import calibration_curve
+from datetime import datetime, timezone
+import numpy as np
 import pandas as pd
+import json
+import os
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+FEATURES_EVAL = ["PROM_GRAL","ASISTENCIA","GEN_ALU","EDAD_ALU"]
+BINS_EDAD = [0,10,14,18,25]
+GRUPOS_EDAD = ["Niñez","PreAdolescente","Adolescente","Adulto"]
+
 def evaluar_modelo(pipeline, X_test, y_test):
     """Calcula métricas básicas y muestra matriz de confusión."""
     y_pred = pipeline.predict(X_test)
@@ -41,7 +49,7 @@ def fairness(pipeline, df_test):
         resultados = []
         for g in sorted(df[feature].dropna().unique()):
             subset = df[df[feature]==g]
-            X = subset[["PROM_GRAL","ASISTENCIA","GEN_ALU","EDAD_ALU"]]
+            X = subset[FEATURES_EVAL]
             y = subset["RIESGO"]
             y_pred = pipeline.predict(X)
             resultados.append({
@@ -54,8 +62,7 @@ def fairness(pipeline, df_test):
         return pd.DataFrame(resultados)
 
     res_gen = evaluar_subgrupos(df_test,"GEN_ALU")
-    df_test["EDAD_GRUPO"] = pd.cut(df_test["EDAD_ALU"],bins=[0,10,14,18,25],
-                                   labels=["Niñez","PreAdolescente","Adolescente","Adulto"])
+    df_test["EDAD_GRUPO"] = pd.cut(df_test["EDAD_ALU"],bins=BINS_EDAD,labels=GRUPOS_EDAD)
     res_age = evaluar_subgrupos(df_test,"EDAD_GRUPO")
 
     fig, ax = plt.subplots(1,2,figsize=(10,4))
@@ -64,3 +71,118 @@ def fairness(pipeline, df_test):
     ax[0].set_title("Recall por Género"); ax[1].set_title("Recall por Grupo Etario")
     plt.tight_layout(); plt.show()
     return res_gen,res_age
+
+
+# ================================================
+# 🗂️ MODO HEADLESS (jobs programados)
+# ================================================
+
+def _metricas_subgrupos(df, feature):
+    """Accuracy/Recall/Precision/F1 por subgrupo con un solo groupby sobre contadores."""
+    conteos = df.assign(
+        ok=df["y"] == df["pred"],
+        tp=df["y"] & df["pred"],
+    ).groupby(feature, observed=True).agg(
+        N=("y", "size"), positivos=("y", "sum"), predichos=("pred", "sum"),
+        aciertos=("ok", "sum"), tp=("tp", "sum"), prob_media=("proba", "mean"),
+    )
+    def dividir(a, b):
+        return np.where(b > 0, a / np.maximum(b, 1), 0.0)
+    conteos["Accuracy"] = conteos["aciertos"] / conteos["N"]
+    conteos["Recall"] = dividir(conteos["tp"], conteos["positivos"])
+    conteos["Precision"] = dividir(conteos["tp"], conteos["predichos"])
+    conteos["F1"] = dividir(2 * conteos["tp"], conteos["positivos"] + conteos["predichos"])
+    return conteos.drop(columns=["aciertos", "tp"]).reset_index()
+
+def _calibracion_bins(y, proba, n_bins):
+    """Mismos bins uniformes que calibration_curve, más la cantidad de casos por bin."""
+    bins = np.searchsorted(np.linspace(0.0, 1.0, n_bins + 1)[1:-1], proba)
+    tabla = pd.DataFrame({"bin": bins, "y": y, "proba": proba}).groupby("bin").agg(
+        prob_media=("proba", "mean"), tasa_observada=("y", "mean"), N=("y", "size"))
+    return tabla.reset_index()
+
+def _guardar_graficos(carpeta, matriz, calib, subgrupos):
+    """Renderiza los gráficos a PNG sin abrir ventanas (Figure directa, sin pyplot)."""
+    from matplotlib.figure import Figure
+
+    os.makedirs(carpeta, exist_ok=True)
+    rutas = {}
+
+    fig = Figure(figsize=(4, 4))
+    ConfusionMatrixDisplay(confusion_matrix=matriz, display_labels=["No Riesgo", "Riesgo"]).plot(
+        cmap="Blues", ax=fig.subplots(), colorbar=False)
+    rutas["matriz_confusion"] = os.path.join(carpeta, "matriz_confusion.png")
+    fig.savefig(rutas["matriz_confusion"], bbox_inches="tight")
+
+    fig = Figure(figsize=(5, 4))
+    ax = fig.subplots()
+    ax.plot(calib["prob_media"], calib["tasa_observada"], "o-", label="Modelo")
+    ax.plot([0,1],[0,1],"--", color="gray", label="Perfecto")
+    ax.set_xlabel("Probabilidad predicha"); ax.set_ylabel("Probabilidad observada")
+    ax.legend(); ax.grid(True)
+    rutas["calibracion"] = os.path.join(carpeta, "calibracion.png")
+    fig.savefig(rutas["calibracion"], bbox_inches="tight")
+
+    fig = Figure(figsize=(10, 4))
+    ax = fig.subplots(1, 2)
+    for eje, (feature, tabla), titulo in zip(ax, subgrupos.items(), ["Recall por Género", "Recall por Grupo Etario"]):
+        eje.bar(tabla[feature].astype(str), tabla["Recall"], color="steelblue")
+        eje.set_title(titulo); eje.set_ylim(0, 1)
+    fig.tight_layout()
+    rutas["fairness"] = os.path.join(carpeta, "fairness.png")
+    fig.savefig(rutas["fairness"], bbox_inches="tight")
+    return rutas
+
+def reporte_evaluacion(modelo, X_test, y_test, ruta="data/reporte_evaluacion.json",
+                       carpeta_graficos=None, umbral=0.5, n_bins=10):
+    """
+    Evaluación completa sin ventanas: un solo predict_proba sobre el test y, a partir de
+    ese vector, métricas globales, bins de calibración y métricas por género y grupo
+    etario (groupby vectorizado). Escribe un JSON en ruta y, si se indica
+    carpeta_graficos, los gráficos como PNG. Retorna el reporte como dict.
+    """
+    y = np.asarray(y_test).astype(bool)
+    proba = modelo.predict_proba(X_test[FEATURES_EVAL])[:, 1]
+    pred = proba > umbral  # igual que predict() con el umbral por defecto
+
+    matriz = confusion_matrix(y, pred, labels=[False, True])
+    metricas = {
+        "N": int(len(y)),
+        "prevalencia": float(y.mean()),
+        "Accuracy": accuracy_score(y, pred),
+        "Precision": precision_score(y, pred, zero_division=0),
+        "Recall": recall_score(y, pred, zero_division=0),
+        "F1": f1_score(y, pred, zero_division=0),
+        "AUC": roc_auc_score(y, proba) if 0 < y.sum() < len(y) else None,
+        "Brier": brier_score_loss(y, proba),
+    }
+    calib = _calibracion_bins(y, proba, n_bins)
+
+    df = pd.DataFrame({
+        "y": y, "pred": pred, "proba": proba,
+        "GEN_ALU": np.asarray(X_test["GEN_ALU"]),
+        "EDAD_GRUPO": pd.cut(np.asarray(X_test["EDAD_ALU"]), bins=BINS_EDAD, labels=GRUPOS_EDAD),
+    })
+    subgrupos = {f: _metricas_subgrupos(df, f) for f in ["GEN_ALU", "EDAD_GRUPO"]}
+
+    reporte = {
+        "generado": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "umbral": umbral,
+        "metricas": metricas,
+        "matriz_confusion": matriz.tolist(),
+        "calibracion": calib.to_dict("records"),
+        "subgrupos": {f: t.assign(**{f: t[f].astype(str)}).to_dict("records") for f, t in subgrupos.items()},
+    }
+    if carpeta_graficos:
+        reporte["graficos"] = _guardar_graficos(carpeta_graficos, matriz, calib, subgrupos)
+
+    if os.path.dirname(ruta):
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump(reporte, f, indent=2, ensure_ascii=False,
+                  default=lambda o: o.item() if hasattr(o, "item") else str(o))
+
+    print(f"Accuracy: {metricas['Accuracy']:.3f} | Precision: {metricas['Precision']:.3f} | "
+          f"Recall: {metricas['Recall']:.3f} | F1: {metricas['F1']:.3f} | Brier: {metricas['Brier']:.4f}")
+    print(f"💾 Reporte de evaluación guardado en {ruta}")
+    return reporte
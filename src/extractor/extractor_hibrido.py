@@ -0,0 +1,97 @@
+"""
+extractor_hibrido.py - Extractor NL→JSON local primero, LLM solo para lo que falte
+Hackathon Duoc UC 2025 - Team 16
+-------------------------------------------------------
+Corre el extractor de expresiones regulares (microsegundos, sin red) y solo llama
+al LLM por los campos que quedaron en _faltantes o con error de rango, con un
+prompt que pide únicamente esos campos. Una descripción bien formada nunca sale
+del proceso. _fuentes indica de dónde salió cada campo ("local" o "LLM").
+"""
+
+import json
+import math
+from src.openaiclient import get_client
+from src.llm_cache import completar
+from src.extractor.extractor_local import parse_nl_to_json, validar_rangos
+from src.extractor.extractor_llm import CAMPOS, MODELO_EXTRACTOR
+
+# Descripción de cada campo para el prompt acotado (misma redacción que extractor_llm)
+DESCRIPCION_CAMPOS = {
+    "ASISTENCIA": "número entre 0 y 100.",
+    "PROM_GRAL": "número entre 1.0 y 7.0.",
+    "EDAD_ALU": "número entre 5 y 25.",
+    "GEN_ALU": "1 si el texto menciona masculino, 2 si menciona femenino.",
+}
+
+
+def campos_pendientes(data: dict) -> list:
+    """Campos sin valor o con error de rango en un resultado de parse_nl_to_json."""
+    con_error = {e.split()[0] for e in data.get("_errores", [])}
+    return [c for c in CAMPOS if c in data.get("_faltantes", []) or c in con_error]
+
+
+def _numero(valor):
+    """Valor del LLM como número ("15" → 15.0); None si no es un número finito."""
+    if isinstance(valor, bool):
+        return None
+    if isinstance(valor, str):
+        try:
+            valor = float(valor.strip().rstrip("%").replace(",", "."))
+        except ValueError:
+            return None
+    if not isinstance(valor, (int, float)) or not math.isfinite(valor):
+        return None
+    return valor
+
+
+def prompt_campos(texto: str, campos: list) -> str:
+    lineas = "\n".join(f"    - {c}: {DESCRIPCION_CAMPOS[c]}" for c in campos)
+    return f"""
+    Extrae del siguiente texto sobre un estudiante solo estas claves y devuélvelas en un JSON
+    (usa null si el texto no lo indica):
+{lineas}
+
+    Texto: "{texto}"
+
+    Asegúrate de devolver solo JSON válido, sin texto adicional.
+    """
+
+
+def parse_nl_to_json_hibrido(texto: str, usar_cache: bool = True) -> dict:
+    """
+    Igual que parse_nl_to_json_llm (mismas claves y validaciones), pero el LLM solo
+    se consulta por los campos que el extractor local no pudo resolver.
+    """
+    data = parse_nl_to_json(texto)
+    pendientes = campos_pendientes(data)
+
+    if pendientes:
+        contenido = completar(
+            get_client(),
+            usar_cache=usar_cache,
+            model=MODELO_EXTRACTOR,
+            messages=[{"role": "user", "content": prompt_campos(texto, pendientes)}],
+            response_format={"type": "json_object"},
+        )
+        respuesta = json.loads(contenido)
+        for campo in pendientes:
+            valor = _numero(respuesta.get(campo))
+            if campo == "GEN_ALU":
+                valor = int(valor) if valor in (1, 2) else None
+            data[campo] = valor
+
+    errores = validar_rangos(data)
+    data["_valido"] = len(errores) == 0
+    data["_faltantes"] = [c for c in CAMPOS if data.get(c) is None]
+    data["_errores"] = errores
+    data["_fuentes"] = {c: "LLM" if c in pendientes else "local" for c in CAMPOS if data.get(c) is not None}
+    data["_fuente"] = "local" if not pendientes else "híbrido"
+
+    return data
+
+
+# Ejemplo de uso directo
+if __name__ == "__main__":
+    ejemplo = "Una estudiante de 15 años con asistencia del 92%, promedio 5.8, género femenino."
+    resultado = parse_nl_to_json_hibrido(ejemplo)
+    print(json.dumps(resultado, indent=4, ensure_ascii=False))
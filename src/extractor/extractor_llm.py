@@ -4,16 +4,26 @@ Hackathon Duoc UC 2025 - Team 16
 -------------------------------------------------------
 Convierte texto libre en un JSON estructurado validado para el modelo ML,
 usando la API de OpenAI con Function Calling y validadores de rango.
+parse_nl_to_json_llm_lote procesa muchas notas (p. ej. un curso completo) en pocas
+requests, reintentando solo las notas que no pasan la validación.
 """
 
-import os
 import json
-from openai import OpenAI
-from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Sequence
 
-# Cargar API Key desde .env o environment.yml
-load_dotenv()
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from src.openaiclient import get_client
+from src.llm_cache import completar
+from src.coach.tokens import contar_tokens
+from src.extractor.extractor_local import validar_rangos
+
+MODELO_EXTRACTOR = "gpt-4-turbo"
+CAMPOS = ["ASISTENCIA", "PROM_GRAL", "EDAD_ALU", "GEN_ALU"]
+
+# Presupuesto por request del modo lote: tokens de las notas y tope de notas (la salida
+# crece ~40 tokens por nota, así que también se limita la cantidad)
+TOKENS_POR_LOTE = 3000
+NOTAS_POR_LOTE = 25
 
 # Estructura esperada del JSON de salida
 json_schema = {
@@ -28,10 +38,11 @@ json_schema = {
 }
 
 
-def parse_nl_to_json_llm(texto: str) -> dict:
+def parse_nl_to_json_llm(texto: str, usar_cache: bool = True) -> dict:
     """
     Usa un modelo LLM (GPT-4-Turbo) para extraer las variables requeridas desde texto libre.
     Retorna un JSON con validaciones y estructura fija.
+    El mismo texto reutiliza la respuesta guardada (src/llm_cache) si usar_cache.
     """
     prompt = f"""
     Eres un asistente que extrae información estructurada desde texto natural.
@@ -46,30 +57,118 @@ def parse_nl_to_json_llm(texto: str) -> dict:
     Asegúrate de devolver solo JSON válido, sin texto adicional.
     """
 
-    response = client.chat.completions.create(
-        model="gpt-4-turbo",
+    contenido = completar(
+        get_client(),
+        usar_cache=usar_cache,
+        model=MODELO_EXTRACTOR,
         messages=[{"role": "user", "content": prompt}],
         response_format={"type": "json_object"},
     )
 
-    data = json.loads(response.choices[0].message.content)
+    data = json.loads(contenido)
+
+    return _validar(data)
+
 
-    # Validaciones básicas
-    errores = []
-    if not (0 <= data["ASISTENCIA"] <= 100):
-        errores.append("ASISTENCIA fuera de rango (0–100)")
-    if not (1.0 <= data["PROM_GRAL"] <= 7.0):
-        errores.append("PROM_GRAL fuera de rango (1.0–7.0)")
-    if not (5 <= data["EDAD_ALU"] <= 25):
-        errores.append("EDAD_ALU fuera de rango (5–25)")
+def _validar(data: dict) -> dict:
+    """Validaciones básicas: campos presentes y dentro de rango."""
+    errores = [f"{c} ausente" for c in CAMPOS if not isinstance(data.get(c), (int, float))]
+    errores += validar_rangos({c: v for c, v in data.items() if isinstance(v, (int, float))})
 
     data["_valido"] = len(errores) == 0
     data["_errores"] = errores
     data["_fuente"] = "LLM"
-
     return data
 
 
+def _armar_lotes(textos: Sequence[str], indices: List[int], max_tokens: int, max_notas: int) -> List[List[int]]:
+    """Agrupa índices de notas en orden sin pasar max_tokens ni max_notas por lote."""
+    lotes, actual, tokens = [], [], 0
+    for i in indices:
+        n = contar_tokens(textos[i], MODELO_EXTRACTOR)
+        if actual and (tokens + n > max_tokens or len(actual) >= max_notas):
+            lotes.append(actual)
+            actual, tokens = [], 0
+        actual.append(i)
+        tokens += n
+    if actual:
+        lotes.append(actual)
+    return lotes
+
+
+def _extraer_lote(textos: Sequence[str], lote: List[int], usar_cache: bool) -> dict:
+    """Una request para todas las notas del lote. Retorna {índice: data validada}."""
+    notas = "\n".join(f'    {{"id": {i}, "texto": {json.dumps(textos[i], ensure_ascii=False)}}}' for i in lote)
+    prompt = f"""
+    Eres un asistente que extrae información estructurada desde texto natural.
+    Para cada nota sobre un estudiante, extrae las siguientes claves:
+    - ASISTENCIA: número entre 0 y 100.
+    - PROM_GRAL: número entre 1.0 y 7.0.
+    - EDAD_ALU: número entre 5 y 25.
+    - GEN_ALU: 1 si el texto menciona masculino, 2 si menciona femenino.
+
+    Notas:
+{notas}
+
+    Devuelve solo JSON válido con la forma {{"resultados": [{{"id": ..., "ASISTENCIA": ..., ...}}]}},
+    un elemento por nota y con el mismo id.
+    """
+
+    contenido = completar(
+        get_client(),
+        usar_cache=usar_cache,
+        model=MODELO_EXTRACTOR,
+        messages=[{"role": "user", "content": prompt}],
+        response_format={"type": "json_object"},
+    )
+
+    salida = {}
+    for item in json.loads(contenido).get("resultados", []):
+        if isinstance(item, dict) and item.get("id") in lote:
+            i = item.pop("id")
+            salida[i] = _validar({c: item.get(c) for c in CAMPOS})
+    return salida
+
+
+def parse_nl_to_json_llm_lote(textos: Sequence[str], usar_cache: bool = True, reintentos: int = 1,
+                              max_tokens: int = TOKENS_POR_LOTE, max_notas: int = NOTAS_POR_LOTE,
+                              max_concurrencia: int = 4) -> List[dict]:
+    """
+    Extrae muchas notas empaquetándolas en pocas requests JSON (lotes bajo max_tokens).
+    Cada ítem pasa por las mismas validaciones que parse_nl_to_json_llm; los que fallan
+    (validación, ausentes en la respuesta o lote con error) se reintentan juntos hasta
+    `reintentos` veces. Retorna un dict por nota, en el mismo orden de entrada.
+    """
+    resultados = [None] * len(textos)
+    pendientes = list(range(len(textos)))
+
+    for intento in range(reintentos + 1):
+        if not pendientes:
+            break
+        lotes = _armar_lotes(textos, pendientes, max_tokens, max_notas)
+        # Los reintentos no usan la cache: repetirían la misma respuesta fallida
+        cache = usar_cache and intento == 0
+
+        with ThreadPoolExecutor(max_workers=max_concurrencia) as pool:
+            futuros = [pool.submit(_extraer_lote, textos, lote, cache) for lote in lotes]
+            for lote, futuro in zip(lotes, futuros):
+                try:
+                    obtenidos = futuro.result()
+                except Exception as e:
+                    obtenidos = {}
+                    error = f"Error en la extracción por lote: {e}"
+                else:
+                    error = "Sin resultado para la nota en la respuesta del lote"
+                for i in lote:
+                    resultados[i] = obtenidos.get(i) or {
+                        **{c: None for c in CAMPOS}, "_valido": False, "_errores": [error], "_fuente": "LLM"
+                    }
+
+        pendientes = [i for i in pendientes if not resultados[i]["_valido"]]
+
+    return resultados
+
+
 # Ejemplo de uso directo
 if __name__ == "__main__":
     ejemplo = "Una estudiante de 15 años con asistencia del 92%, promedio 5.8, género femenino."
@@ -5,55 +5,71 @@ Hackathon Duoc UC 2025 - Equipo Team 16
 Convierte texto libre en un JSON estructurado con validadores de negocio.
 """
 
+import os
 import re
 import json
+import time
+import random
+from concurrent.futures import ProcessPoolExecutor
 
-def parse_nl_to_json(texto: str) -> dict:
-    """
-    Extrae información numérica y categórica desde texto libre.
-    Detecta: asistencia (%), promedio (1.0–7.0), edad (años) y género (masculino/femenino).
-    Retorna un diccionario validado y compatible con el modelo ML.
-    """
+import pandas as pd
+
+# Rangos de negocio por campo: (mínimo, máximo, texto para el mensaje de error)
+RANGOS = {
+    "PROM_GRAL": (1.0, 7.0, "1.0–7.0"),
+    "ASISTENCIA": (0, 100, "0–100"),
+    "EDAD_ALU": (5, 25, "5–25"),
+}
+
+
+def validar_rangos(data: dict) -> list:
+    """Mensajes de error de los campos presentes que están fuera de su rango."""
+    return [
+        f"{campo} fuera de rango ({texto})"
+        for campo, (minimo, maximo, texto) in RANGOS.items()
+        if data.get(campo) is not None and not (minimo <= data[campo] <= maximo)
+    ]
+
+
+# Patrones base mejorados, compilados una sola vez
+PATRONES = {
+    # Exige la palabra "asistencia" o un "%": si no, tomaba cualquier número (p. ej. la edad)
+    "ASISTENCIA": r"asistencia\s*(?:del?\s*)?(\d{1,3})|(\d{1,3})\s*(?:%|por\s*ciento)",
+    "PROM_GRAL": r"(?:promedio|nota)\s*(?:de\s*)?(\d+(?:[.,]\d+)?)",
+    "EDAD_ALU": r"(\d{1,2})\s*(?:años|año)",
+    "GEN_ALU": r"\b(masculin[oa]|fem[ei]nin[oa])\b",
+}
+_PATRONES = {campo: re.compile(p, re.IGNORECASE) for campo, p in PATRONES.items()}
+
+# Todos los campos en una sola pasada sobre el texto en minúsculas (sin IGNORECASE, más
+# rápido). El lookahead inicial deja saltar de inmediato las posiciones que no pueden
+# empezar ningún patrón: a(sistencia), p(romedio), n(ota), m(asculino), f(emenino), dígitos.
+_COMBINADO = re.compile(
+    r"(?=[apnmf\d])(?:" + "|".join(f"(?P<{campo}>{p})" for campo, p in PATRONES.items()) + ")"
+)
+# Posición (desde, hasta) en hit.groups() de los grupos propios de cada campo
+_GRUPOS = {
+    campo: (_COMBINADO.groupindex[campo], _COMBINADO.groupindex[campo] + re.compile(p).groups)
+    for campo, p in PATRONES.items()
+}
 
-    
-
-    # Patrones base mejorados
-    patrones = {
-        "ASISTENCIA": re.search(
-            r"(?:asistencia\s*(?:de\s*)?)?(\d{1,3})\s*(?:%|por\s*ciento)?",
-            texto,
-            re.IGNORECASE
-        ),
-        "PROM_GRAL": re.search(
-            r"(?:promedio|nota)\s*(?:de\s*)?(\d+(?:[.,]\d+)?)",
-            texto,
-            re.IGNORECASE
-        ),
-        "EDAD_ALU": re.search(
-            r"(\d{1,2})\s*(?:años|año)",
-            texto,
-            re.IGNORECASE
-        ),
-        "GEN_ALU": re.search(
-            r"\b(masculin[oa]|feminin[oa])\b",
-            texto,
-            re.IGNORECASE
-        )
-    }
-
-
-    
+# Desde este tamaño parse_nl_to_json_lote reparte las notas en procesos
+MIN_NOTAS_POOL = 20_000
 
+
+def _armar(matches: dict) -> dict:
+    """Convierte los match de cada campo en el diccionario validado."""
     # Valores encontrados
     data = {}
 
     # Conversión segura de cada valor encontrado
-    for campo, match in patrones.items():
+    for campo in PATRONES:
+        match = matches.get(campo)
         if not match:
             data[campo] = None
             continue
 
-        valor = match.group(1).replace(",", ".")
+        valor = next(g for g in match.groups() if g is not None).replace(",", ".")
         if campo in ["PROM_GRAL", "EDAD_ALU", "ASISTENCIA"]:
             try:
                 valor = float(valor)
@@ -66,13 +82,7 @@ def parse_nl_to_json(texto: str) -> dict:
             data[campo] = valor
 
     # Validadores de rango
-    errores = []
-    if data.get("PROM_GRAL") is not None and not (1.0 <= data["PROM_GRAL"] <= 7.0):
-        errores.append("PROM_GRAL fuera de rango (1.0–7.0)")
-    if data.get("ASISTENCIA") is not None and not (0 <= data["ASISTENCIA"] <= 100):
-        errores.append("ASISTENCIA fuera de rango (0–100)")
-    if data.get("EDAD_ALU") is not None and not (5 <= data["EDAD_ALU"] <= 25):
-        errores.append("EDAD_ALU fuera de rango (5–25)")
+    errores = validar_rangos(data)
 
     data["_valido"] = len(errores) == 0
     data["_faltantes"] = [k for k, v in data.items() if v is None and not k.startswith("_")]
@@ -81,8 +91,114 @@ def parse_nl_to_json(texto: str) -> dict:
     return data
 
 
-# Ejemplo de uso directo (solo para prueba local)
+def parse_nl_to_json(texto: str) -> dict:
+    """
+    Extrae información numérica y categórica desde texto libre.
+    Detecta: asistencia (%), promedio (1.0–7.0), edad (años) y género (masculino/femenino).
+    Retorna un diccionario validado y compatible con el modelo ML.
+    """
+    return _armar({campo: patron.search(texto) for campo, patron in _PATRONES.items()})
+
+
+def parse_nl_to_json_rapido(texto: str) -> dict:
+    """
+    Mismo resultado que parse_nl_to_json, recorriendo el texto una sola vez y leyendo
+    los valores directo de los grupos del patrón combinado. Diferencia: si dos campos
+    reclaman el mismo número ("promedio 85%"), el número queda solo para el primero.
+    """
+    valores = {}
+    for hit in _COMBINADO.finditer(texto.lower()):
+        campo = hit.lastgroup
+        if campo not in valores:
+            desde, hasta = _GRUPOS[campo]
+            valores[campo] = next(g for g in hit.groups()[desde:hasta] if g is not None)
+            if len(valores) == len(PATRONES):
+                break
+
+    data = {}
+    for campo in ("ASISTENCIA", "PROM_GRAL", "EDAD_ALU"):
+        valor = valores.get(campo)
+        data[campo] = float(valor.replace(",", ".")) if valor is not None else None
+    genero = valores.get("GEN_ALU")
+    data["GEN_ALU"] = None if genero is None else 1 if genero.startswith("masculin") else 2
+
+    errores = validar_rangos(data)
+    data["_valido"] = len(errores) == 0
+    data["_faltantes"] = [k for k, v in data.items() if v is None and not k.startswith("_")]
+    data["_errores"] = errores
+    return data
+
+
+def _parse_bloque(textos: list) -> list:
+    return [parse_nl_to_json_rapido(t) for t in textos]
+
+
+def parse_nl_to_json_lote(textos, workers=None, chunksize: int = 5_000):
+    """
+    Extrae muchas notas (lista o pd.Series). Con MIN_NOTAS_POOL notas o más se reparten
+    en bloques de chunksize entre procesos (workers=1 lo fuerza en serie).
+    Retorna una lista de dicts, o un DataFrame con el mismo índice si recibe una Series.
+    """
+    serie = textos if isinstance(textos, pd.Series) else None
+    textos = serie.fillna("").astype(str).tolist() if serie is not None else list(textos)
+
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(textos) >= MIN_NOTAS_POOL:
+        bloques = [textos[i:i + chunksize] for i in range(0, len(textos), chunksize)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            resultados = [data for bloque in pool.map(_parse_bloque, bloques) for data in bloque]
+    else:
+        resultados = _parse_bloque(textos)
+
+    if serie is not None:
+        return pd.DataFrame(resultados, index=serie.index)
+    return resultados
+
+
+def _notas_sinteticas(n: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    plantillas = [
+        "Alumno de {e} años con asistencia del {a}%, promedio {p}, género masculino.",
+        "Estudiante femenina, {e} años. Nota {p}. Asistencia de {a} por ciento.",
+        "Tiene {e} años y {a}% de asistencia; promedio {p}. Le cuesta matemáticas.",
+        "Alumna con promedio {p}, asistencia {a}. No indica edad.",
+    ]
+    return [
+        rng.choice(plantillas).format(e=rng.randint(6, 20), a=rng.randint(40, 100),
+                                      p=f"{rng.randint(10, 70) / 10}".replace(".", rng.choice(".,")))
+        for _ in range(n)
+    ]
+
+
+def benchmark(n: int = 200_000) -> None:
+    """Notas por segundo de cada extractor sobre notas sintéticas."""
+    from src.extractor.extractor_perfil import extract_profile_from_text
+
+    notas = _notas_sinteticas(n)
+    muestra = notas[:20_000]
+
+    def medir(fn, textos):
+        t0 = time.perf_counter()
+        fn(textos)
+        return len(textos) / (time.perf_counter() - t0)
+
+    assert _parse_bloque(muestra) == [parse_nl_to_json(t) for t in muestra]
+    filas = [
+        ("extractor_perfil.extract_profile_from_text", medir(lambda ts: [extract_profile_from_text(t) for t in ts], muestra)),
+        ("parse_nl_to_json", medir(lambda ts: [parse_nl_to_json(t) for t in ts], muestra)),
+        ("parse_nl_to_json_lote (1 proceso)", medir(lambda ts: parse_nl_to_json_lote(ts, workers=1), muestra)),
+        (f"parse_nl_to_json_lote (pool, {os.cpu_count()} CPU)", medir(parse_nl_to_json_lote, notas)),
+    ]
+    for nombre, notas_s in filas:
+        print(f"{nombre:<40} {notas_s:>12,.0f} notas/s")
+
+
+# Ejemplo de uso directo (solo para prueba local); con --benchmark mide notas/s
 if __name__ == "__main__":
+    import sys
+    if "--benchmark" in sys.argv:
+        benchmark()
+        sys.exit()
     ejemplo = "Alumno con asistencia de 85 por ciento, promedio 5,8. Edad 14 años, género masculino."
     resultado = parse_nl_to_json(ejemplo)
     print(json.dumps(resultado, indent=4, ensure_ascii=False))
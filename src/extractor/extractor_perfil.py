@@ -0,0 +1,71 @@
+"""
+extractor_perfil.py - Extractor heurístico del chat de la demo (fronted.py)
+Hackathon Duoc UC 2025 - Team 16
+-------------------------------------------------------
+Detecta edad, sexo, promedio, asistencia y la asignatura que cuesta en el mensaje
+del estudiante. Vive fuera de fronted.py para poder importarlo sin levantar la app
+(p. ej. desde el benchmark de extractor_local).
+"""
+
+import re
+from typing import Any, Dict
+
+# Patrones compilados una vez al importar el módulo
+_RE_EDAD = re.compile(r"(\d{1,2})\s*(años|anios|edad)")
+_RE_EDAD_CLAVE = re.compile(r"edad\s*[:=]?\s*(\d{1,2})")
+_RE_PROMEDIO = re.compile(r"(promedio|nota[s]?\s*promedio)\s*[:=]?\s*([1-7](?:[.,]\d{1,2})?)")
+_RE_ASISTENCIA = re.compile(r"(asistencia|presencia)\s*[:=]?\s*(\d{1,3})\s*%?")
+_RE_ASIGNATURA = re.compile(r"(me\s+cuesta|dificultad\s+en|complica\s+|problema\s+con)\s+([a-záéíóúñ ]{3,})")
+
+
+def extract_profile_from_text(text: str) -> Dict[str, Any]:
+    """
+    Heurística simple: busca patrones de edad, sexo, promedio (1-7), asistencia (%)
+    y asignatura 'que me cuesta' en lenguaje natural.
+    Si no encuentra, deja campos como None.
+    """
+    t = text.lower()
+
+    # Edad
+    edad = None
+    m_edad = _RE_EDAD.search(t) or _RE_EDAD_CLAVE.search(t)
+    if m_edad:
+        for g in m_edad.groups():
+            if g and g.isdigit():
+                edad = int(g)
+                break
+
+    # Sexo
+    sexo = None
+    if any(w in t for w in ["masculino", "hombre", "varón", "varon"]):
+        sexo = "Masculino"
+    elif any(w in t for w in ["femenino", "mujer"]):
+        sexo = "Femenino"
+    elif any(w in t for w in ["no binario", "nobinario", "nb"]):
+        sexo = "No binario"
+
+    # Promedio (1.0 a 7.0)
+    promedio = None
+    m_prom = _RE_PROMEDIO.search(t)
+    if m_prom:
+        promedio = float(m_prom.group(2).replace(",", "."))
+
+    # Asistencia (%)
+    asistencia = None
+    m_asist = _RE_ASISTENCIA.search(t)
+    if m_asist:
+        asistencia = min(100, max(0, int(m_asist.group(2))))
+
+    # Asignatura que cuesta
+    asignatura = None
+    m_asig = _RE_ASIGNATURA.search(t)
+    if m_asig:
+        asignatura = m_asig.group(2).strip().title()
+
+    return {
+        "edad": edad,
+        "sexo": sexo,
+        "promedio": promedio,          # escala 1–7
+        "asistencia_pct": asistencia,  # 0–100
+        "asignatura_dificil": asignatura,
+    }
@@ -6,16 +6,19 @@ Permite ingresar texto libre o datos estructurados y obtener un plan personaliza
 """
 
 # --- Add project root to sys.path so "src" is importable ---
-import os, sys, re
+import os, sys, time
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
 if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
 # -----------------------------------------------------------
 
 import streamlit as st
-from src.extractor.extractor_llm import parse_nl_to_json_llm
-from src.coach.coach_llm import PerfilAlumno, coach_plan
+from src.extractor.extractor_hibrido import parse_nl_to_json_hibrido
+from src.coach.coach_llm import PerfilAlumno, coach_plan_stream
 from src.coach.modelo_riesgo import predecir_riesgo
+from src.coach.biblioteca import plan_desde_biblioteca
+from src.coach.rag import get_rag
+from src.openaiclient import get_client
 
 
 # -----------------------------
@@ -35,6 +38,25 @@ para estimar riesgo y generar planes personalizados basados en evidencia educati
 
 st.divider()
 
+
+# -----------------------------
+# ♻️ RECURSOS COMPARTIDOS
+# -----------------------------
+@st.cache_resource(show_spinner="Cargando índice RAG y cliente LLM... ⏳")
+def cargar_recursos():
+    """Índice RAG y cliente OpenAI: se crean una vez por proceso y los comparten todas las sesiones."""
+    return get_rag(), get_client()
+
+
+try:
+    cargar_recursos()
+except Exception as e:
+    st.warning(f"⚠️ El coach LLM no está disponible: {e}")
+
+# Planes ya generados en esta sesión, por perfil (evita regenerar al repetir el clic)
+if "planes" not in st.session_state:
+    st.session_state.planes = {}
+
 # -----------------------------
 # 🧠 ENTRADA DE DATOS
 # -----------------------------
@@ -58,15 +80,48 @@ else:
         genero = st.selectbox("Género", ["Masculino", "Femenino"])
     texto = None
 
+personalizado = st.checkbox(
+    "Plan totalmente personalizado (IA en vivo)",
+    value=False,
+    help="Si no se marca, se usa al instante el plan precalculado para perfiles similares.",
+)
+
+
+class FormateadorChecklist:
+    """
+    Formatea el plan línea a línea a medida que llega: "- [ ]" → "☑️" y una línea
+    en blanco después de cada ítem del checklist para mayor legibilidad.
+    """
+
+    def __init__(self):
+        self.lineas = []
+        self.parcial = ""
+
+    @staticmethod
+    def _formatear(linea: str) -> str:
+        linea = linea.replace("- [ ]", "☑️")
+        return linea + "\n" if "☑️" in linea else linea
+
+    def agregar(self, fragmento: str) -> None:
+        *completas, self.parcial = (self.parcial + fragmento).split("\n")
+        self.lineas.extend(self._formatear(l) for l in completas)
+
+    def texto(self) -> str:
+        return "\n".join(self.lineas + [self.parcial.replace("- [ ]", "☑️")])
+
+
 # -----------------------------
 # ⚙️ BOTÓN DE EJECUCIÓN
 # -----------------------------
 if st.button("🚀 Generar plan personalizado"):
-    with st.spinner("Analizando información... ⏳"):
-        try:
-            # 🧩 Si se usa modo IA → procesar texto con extractor LLM
+    try:
+        with st.spinner("Analizando información... ⏳"):
+            # 🧩 Si se usa modo IA → extractor local y LLM solo para los campos que falten
             if modo == "Texto libre (IA)" and texto:
-                data = parse_nl_to_json_llm(texto)
+                extraido = parse_nl_to_json_hibrido(texto)
+                data = {k: v for k, v in extraido.items() if v is not None}
+                st.caption("🔎 Origen de los datos: " + ", ".join(
+                    f"{campo} ({fuente})" for campo, fuente in extraido["_fuentes"].items()))
                 asistencia = data.get("ASISTENCIA", 85)
                 promedio = data.get("PROM_GRAL", 5.0)
                 edad = int(data.get("EDAD_ALU", 15))
@@ -81,51 +136,69 @@ if st.button("🚀 Generar plan personalizado"):
             )
 
             # 📊 Calcular riesgo de deserción
-            nivel_riesgo, prob_riesgo = predecir_riesgo(asistencia, promedio, edad)
-
-            # 🤖 Generar plan personalizado
-            resultado = coach_plan(perfil)
-
-            # -----------------------------
-            # 🎯 RESULTADOS VISUALES
-            # -----------------------------
-            st.success("✅ Plan personalizado generado exitosamente.")
-
-            # 🔥 Sección de riesgo con colores según nivel
-            color = {"Bajo": "🟢", "Medio": "🟡", "Alto": "🔴"}.get(nivel_riesgo, "⚪")
-            st.subheader("📊 Nivel de riesgo de deserción")
-            st.markdown(f"""
-            **Nivel:** {color} **{nivel_riesgo}**  
-            **Probabilidad estimada:** {prob_riesgo * 100:.1f} %
-            """)
-
-            # -----------------------------
-            # 🧾 Plan estructurado
-            # -----------------------------
-            st.subheader("📋 Plan de Acción Personalizado")
-
-            # Reemplazar y formatear los checkboxes para mayor legibilidad
-            plan_markdown = resultado["plan"].replace("- [ ]", "☑️")
-            plan_markdown = re.sub(r"(☑️.*?)\s(?=☑️|$)", r"\1\n\n", plan_markdown)
-
-            st.markdown(plan_markdown, unsafe_allow_html=True)
-
-            # -----------------------------
-            # 📚 Fuentes
-            # -----------------------------
-            st.subheader("📚 Fuentes consultadas")
-            st.write(", ".join([f"📄 {src}" for src in resultado["fuentes"]]))
-
-            # -----------------------------
-            # ⚠️ Derivación
-            # -----------------------------
-            if resultado["guardrail_derivacion"]:
-                st.warning("⚠️ Se recomienda derivación al Orientador Escolar.")
-            else:
-                st.info("💬 Sin necesidad de derivación por ahora.")
-
-            st.divider()
-            st.caption("Team 16 - Hackathon IA Duoc UC 2025")
-
-        except Exception as e:
-            st.error(f"❌ Error al generar el plan: {e}")
+            nivel_riesgo, prob_riesgo = predecir_riesgo(asistencia, promedio, edad, perfil.genero)
+
+            # 🤖 Plan ya visto en la sesión o precalculado del bucket (si no se pidió uno en vivo)
+            clave_plan = (perfil.asistencia, perfil.promedio, perfil.edad, perfil.genero, personalizado)
+            resultado = st.session_state.planes.get(clave_plan)
+            if resultado is None and not personalizado:
+                resultado = plan_desde_biblioteca(perfil)
+
+        # -----------------------------
+        # 🎯 RESULTADOS VISUALES
+        # -----------------------------
+        # 🔥 Sección de riesgo con colores según nivel
+        color = {"Bajo": "🟢", "Medio": "🟡", "Alto": "🔴"}.get(nivel_riesgo, "⚪")
+        st.subheader("📊 Nivel de riesgo de deserción")
+        st.markdown(f"""
+        **Nivel:** {color} **{nivel_riesgo}**  
+        **Probabilidad estimada:** {prob_riesgo * 100:.1f} %
+        """)
+
+        # -----------------------------
+        # 🧾 Plan estructurado
+        # -----------------------------
+        st.subheader("📋 Plan de Acción Personalizado")
+        formato = FormateadorChecklist()
+
+        if resultado is None:
+            # Generación en vivo: se muestra el texto a medida que llegan los tokens
+            stream = coach_plan_stream(perfil)
+            salida = st.empty()
+            ultimo_render = 0.0
+            for fragmento in stream:
+                formato.agregar(fragmento)
+                if time.monotonic() - ultimo_render > 0.05:
+                    salida.markdown(formato.texto() + "▌", unsafe_allow_html=True)
+                    ultimo_render = time.monotonic()
+            salida.markdown(formato.texto(), unsafe_allow_html=True)
+            resultado = stream.resultado
+        else:
+            formato.agregar(resultado["plan"])
+            st.markdown(formato.texto(), unsafe_allow_html=True)
+            if resultado.get("origen") == "biblioteca":
+                st.caption("⚡ Plan precalculado para perfiles similares. "
+                           "Marca «Plan totalmente personalizado» para generarlo en vivo.")
+        st.session_state.planes[clave_plan] = resultado
+
+        st.success("✅ Plan personalizado generado exitosamente.")
+
+        # -----------------------------
+        # 📚 Fuentes
+        # -----------------------------
+        st.subheader("📚 Fuentes consultadas")
+        st.write(", ".join([f"📄 {src}" for src in resultado["fuentes"]]))
+
+        # -----------------------------
+        # ⚠️ Derivación
+        # -----------------------------
+        if resultado["guardrail_derivacion"]:
+            st.warning("⚠️ Se recomienda derivación al Orientador Escolar.")
+        else:
+            st.info("💬 Sin necesidad de derivación por ahora.")
+
+        st.divider()
+        st.caption("Team 16 - Hackathon IA Duoc UC 2025")
+
+    except Exception as e:
+        st.error(f"❌ Error al generar el plan: {e}")
@@ -0,0 +1,88 @@
+"""
+medir_reruns.py - Latencia por rerun y memoria por sesión de los frontends Streamlit.
+Parte del proyecto Hackathon Duoc UC 2025
+
+Ejecuta el script con streamlit.testing (sin navegador), varias sesiones y varios
+reruns por sesión, y reporta:
+- primer run (incluye cargar recursos) y mediana de los reruns siguientes,
+- pico de memoria asignada durante un rerun,
+- memoria retenida por sesión (lo que queda vivo al terminar todos los reruns).
+
+Uso:
+    python -m src.frontend.medir_reruns fronted.py
+    python -m src.frontend.medir_reruns src/frontend/app_streamlit.py --clic --stub
+Con --clic cada rerun presiona el primer botón (en app_streamlit, modo Manual);
+con --stub el LLM es el servidor local de src.coach.stub_llm.
+"""
+
+import os
+import sys
+import time
+import tempfile
+import argparse
+import statistics
+import tracemalloc
+
+from streamlit.testing.v1 import AppTest
+
+
+def _rerun(at: AppTest, clic: bool) -> None:
+    if clic and at.button:
+        if at.radio and "Manual" in at.radio[0].options:
+            at.radio[0].set_value("Manual")
+        at.button[0].click()
+    at.run()
+
+
+def medir(script: str, reruns: int = 20, sesiones: int = 3, clic: bool = False) -> dict:
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    primeros, tiempos, picos = [], [], []
+    sesiones_vivas = []
+
+    for _ in range(sesiones):
+        at = AppTest.from_file(script, default_timeout=120)
+        for i in range(reruns):
+            antes = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            t0 = time.perf_counter()
+            _rerun(at, clic and i > 0)
+            dt = time.perf_counter() - t0
+            picos.append(tracemalloc.get_traced_memory()[1] - antes)
+            (primeros if i == 0 else tiempos).append(dt)
+        if at.exception or at.error:
+            raise RuntimeError((at.exception or at.error)[0].value)
+        sesiones_vivas.append(at)
+
+    retenida = (tracemalloc.get_traced_memory()[0] - base) / sesiones
+    tracemalloc.stop()
+    return {
+        "primer_run_ms": 1000 * statistics.median(primeros),
+        "rerun_ms": 1000 * statistics.median(tiempos) if tiempos else float("nan"),
+        "pico_rerun_kb": statistics.median(picos) / 1024,
+        "memoria_sesion_kb": retenida / 1024,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("script")
+    parser.add_argument("--reruns", type=int, default=20)
+    parser.add_argument("--sesiones", type=int, default=3)
+    parser.add_argument("--clic", action="store_true")
+    parser.add_argument("--stub", action="store_true")
+    args = parser.parse_args()
+
+    if args.stub:
+        from src.coach.stub_llm import iniciar_servidor
+        servidor = iniciar_servidor(latencia=0.0)
+        os.environ["OPENAI_BASE_URL"] = servidor.base_url
+        os.environ.setdefault("OPENAI_API_KEY", "stub")
+        # Cache propia de la medición: las respuestas del stub no llegan a la cache compartida
+        os.environ["LLM_CACHE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="medir-reruns-"), "llm_cache.sqlite")
+
+    script = os.path.abspath(args.script)  # AppTest resuelve rutas relativas a este archivo
+    sys.path.insert(0, os.path.dirname(script))
+    r = medir(script, reruns=args.reruns, sesiones=args.sesiones, clic=args.clic)
+    print(f"⏱️ {args.script}: primer run {r['primer_run_ms']:.1f} ms | rerun (mediana) {r['rerun_ms']:.1f} ms")
+    print(f"🧠 pico por rerun {r['pico_rerun_kb']:.0f} KB | retenida por sesión {r['memoria_sesion_kb']:.0f} KB")
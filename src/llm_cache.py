@@ -0,0 +1,161 @@
+"""
+llm_cache.py - Cache persistente (SQLite) de respuestas del LLM.
+
+La clave es el SHA-256 del endpoint (base URL del cliente) + modelo + mensajes (prompt
+completo, que ya incluye contexto RAG y versión de plantilla) + parámetros de generación:
+respuestas de un servidor de pruebas nunca se sirven a llamadas contra la API real. Entradas con TTL, y desalojo
+LRU cuando el tamaño total supera el máximo. Contadores de hits/misses en stats().
+
+Configuración por variables de entorno:
+- LLM_CACHE_PATH (por defecto data/cache/llm_cache.sqlite)
+- LLM_CACHE_MAX_MB (por defecto 100)
+- LLM_CACHE_TTL_HORAS (por defecto 168 = 7 días)
+- LLM_CACHE=0 desactiva la cache
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Optional
+
+
+def clave_llm(endpoint: str, **params) -> str:
+    """
+    Hash estable del endpoint (str(client.base_url)) y de todos los argumentos de la
+    llamada (model, messages, temperature, ...).
+    """
+    payload = json.dumps({"endpoint": str(endpoint), "params": params},
+                         sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    def __init__(self, ruta: str, max_bytes: int = 100 * 1024**2, ttl_segundos: float = 7 * 24 * 3600):
+        self.ruta = ruta
+        self.max_bytes = max_bytes
+        self.ttl = ttl_segundos
+        self.hits = 0
+        self.misses = 0
+        self.desalojos = 0
+        self._lock = threading.Lock()
+
+        if os.path.dirname(ruta):
+            os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        self._db = sqlite3.connect(ruta, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS respuestas (
+                clave TEXT PRIMARY KEY,
+                valor TEXT NOT NULL,
+                creado REAL NOT NULL,
+                ultimo_acceso REAL NOT NULL,
+                bytes INTEGER NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_acceso ON respuestas(ultimo_acceso)")
+
+    def get(self, clave: str) -> Optional[str]:
+        ahora = time.time()
+        with self._lock:
+            fila = self._db.execute(
+                "SELECT valor, creado FROM respuestas WHERE clave = ?", (clave,)
+            ).fetchone()
+            if fila is None or ahora - fila[1] > self.ttl:
+                if fila is not None:
+                    self._db.execute("DELETE FROM respuestas WHERE clave = ?", (clave,))
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE respuestas SET ultimo_acceso = ? WHERE clave = ?", (ahora, clave))
+            self.hits += 1
+            return fila[0]
+
+    def set(self, clave: str, valor: str) -> None:
+        ahora = time.time()
+        tam = len(valor.encode("utf-8"))
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO respuestas VALUES (?, ?, ?, ?, ?)",
+                (clave, valor, ahora, ahora, tam),
+            )
+            self._desalojar()
+
+    def _desalojar(self) -> None:
+        """Borra expirados y luego los menos usados hasta quedar bajo max_bytes."""
+        self._db.execute("DELETE FROM respuestas WHERE creado < ?", (time.time() - self.ttl,))
+        total = self._db.execute("SELECT COALESCE(SUM(bytes), 0) FROM respuestas").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for clave, tam in self._db.execute(
+            "SELECT clave, bytes FROM respuestas ORDER BY ultimo_acceso ASC"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM respuestas WHERE clave = ?", (clave,))
+            total -= tam
+            self.desalojos += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            n, total = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM respuestas"
+            ).fetchone()
+        consultas = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / consultas if consultas else 0.0,
+            "desalojos": self.desalojos,
+            "entradas": n,
+            "bytes": total,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM respuestas")
+
+
+_CACHE: Optional[LLMCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMCache]:
+    """Cache compartida del proceso (None si LLM_CACHE=0)."""
+    global _CACHE
+    if os.getenv("LLM_CACHE", "1") == "0":
+        return None
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            _CACHE = LLMCache(
+                os.getenv("LLM_CACHE_PATH", "data/cache/llm_cache.sqlite"),
+                max_bytes=int(float(os.getenv("LLM_CACHE_MAX_MB", 100)) * 1024**2),
+                ttl_segundos=float(os.getenv("LLM_CACHE_TTL_HORAS", 168)) * 3600,
+            )
+        return _CACHE
+
+
+def completar(client, usar_cache: bool = True, **params) -> str:
+    """
+    chat.completions.create(**params) con cache: retorna el contenido del primer mensaje.
+    Solo se guarda la respuesta si la llamada terminó bien.
+    """
+    cache = get_llm_cache() if usar_cache else None
+    clave = clave_llm(client.base_url, **params) if cache is not None else None
+    if cache is not None:
+        guardado = cache.get(clave)
+        if guardado is not None:
+            return guardado
+
+    response = client.chat.completions.create(**params)
+    contenido = response.choices[0].message.content
+    if cache is not None and contenido is not None:
+        cache.set(clave, contenido)
+    return contenido
+
+
+def cache_stats() -> dict:
+    """Contadores de la cache compartida (vacío si está desactivada)."""
+    cache = get_llm_cache()
+    return cache.stats() if cache is not None else {}
@@ -6,26 +6,96 @@ Parte del proyecto Hackathon Duoc UC 2025 (Tutor Virtual Adaptativo IA Híbrida)
 import pandas as pd
 import numpy as np
 
+# Columnas que realmente usa el motor de riesgo y cómo se leen desde el CSV.
+# Las numéricas "sucias" se leen como texto y se convierten en preparar_dataset
+# con errors="coerce", igual que con la carga completa.
+COLUMNAS_USADAS = ["AGNO", "SIT_FIN", "PROM_GRAL", "ASISTENCIA", "GEN_ALU", "EDAD_ALU"]
+DTYPES_CSV = {
+    "AGNO": "float64",
+    "SIT_FIN": str,
+    "PROM_GRAL": str,
+    "ASISTENCIA": str,
+    "GEN_ALU": "float64",
+    "EDAD_ALU": str,
+}
+
+# Versión de la lógica de preparación: súbela al cambiar _limpiar para invalidar caches
+VERSION_PREPARACION = "1"
+
+# Representación compacta (modo compacto=True): ~4x menos memoria que object/float64
+SIT_FIN_DTYPE = pd.CategoricalDtype(["P", "R", "Y"])
+DTYPES_COMPACTOS = {
+    "AGNO": "int16",
+    "SIT_FIN": SIT_FIN_DTYPE,
+    "PROM_GRAL": "float32",
+    "ASISTENCIA": "float32",
+    "GEN_ALU": "int8",
+    "EDAD_ALU": "uint8",
+    "RIESGO": "int8",
+}
+
+def detectar_formato(ruta, n_bytes=65536):
+    """Detecta separador y codificación leyendo solo una muestra del inicio del archivo."""
+    with open(ruta, "rb") as f:
+        muestra = f.read(n_bytes)
+    # Cortamos en el último salto de línea para no partir un carácter multibyte
+    if len(muestra) == n_bytes and b"\n" in muestra:
+        muestra = muestra[:muestra.rfind(b"\n")]
+
+    try:
+        texto = muestra.decode("utf-8")
+        encoding = "utf-8"
+    except UnicodeDecodeError:
+        texto = muestra.decode("latin1")
+        encoding = "latin1"
+
+    encabezado = texto.lstrip("\ufeff").splitlines()[0] if texto else ""
+    sep = ";" if encabezado.count(";") >= encabezado.count(",") and ";" in encabezado else ","
+    columnas = [c.strip().strip('"') for c in encabezado.split(sep)]
+    faltantes = [c for c in COLUMNAS_USADAS if c not in columnas]
+    if faltantes:
+        raise RuntimeError(f"❌ El CSV no contiene las columnas requeridas: {faltantes}")
+    return {"sep": sep, "encoding": encoding}
+
 def cargar_csv(ruta="data/rendimiento-data.csv"):
-    """Lee el CSV de rendimiento escolar probando separadores y codificaciones comunes."""
-    intentos = [
-        {"sep": ";", "encoding": "utf-8"},
-        {"sep": ";", "encoding": "latin1"},
-        {"sep": ",", "encoding": "utf-8"},
-    ]
-    for cfg in intentos:
-        try:
-            df = pd.read_csv(ruta, low_memory=False, **cfg)
-            print(f"✅ Cargado con sep='{cfg['sep']}', encoding='{cfg['encoding']}'")
-            return df
-        except Exception:
-            continue
-    raise RuntimeError("❌ No se pudo leer el CSV con los separadores y codificaciones probados.")
-
-def preparar_dataset(df):
-    """Filtra columnas necesarias, convierte tipos, crea variable RIESGO y devuelve df_model listo para ML."""
-    columnas_usadas = ["AGNO", "SIT_FIN", "PROM_GRAL", "ASISTENCIA", "GEN_ALU", "EDAD_ALU"]
-    df_model = df[columnas_usadas].copy()
+    """Lee el CSV de rendimiento escolar completo, detectando separador y codificación una sola vez."""
+    cfg = detectar_formato(ruta)
+    df = pd.read_csv(ruta, low_memory=False, **cfg)
+    print(f"✅ Cargado con sep='{cfg['sep']}', encoding='{cfg['encoding']}'")
+    return df
+
+def iterar_csv(ruta="data/rendimiento-data.csv", chunksize=500_000, compacto=False):
+    """
+    Lee el CSV por bloques usando solo las columnas del modelo con dtypes explícitos
+    y entrega cada bloque ya preparado. La memoria máxima depende de chunksize,
+    no del tamaño del archivo.
+    """
+    cfg = detectar_formato(ruta)
+    lector = pd.read_csv(
+        ruta,
+        usecols=COLUMNAS_USADAS,
+        dtype=DTYPES_CSV,
+        chunksize=chunksize,
+        **cfg,
+    )
+    with lector:
+        for chunk in lector:
+            yield _limpiar_compacto(chunk) if compacto else _limpiar(chunk)
+
+def cargar_dataset(ruta="data/rendimiento-data.csv", chunksize=500_000, compacto=False):
+    """Carga por bloques y devuelve df_model listo para ML (equivalente a cargar_csv + preparar_dataset)."""
+    partes = [c for c in iterar_csv(ruta, chunksize=chunksize, compacto=compacto) if len(c)]
+    if partes:
+        df_model = pd.concat(partes, ignore_index=True)
+    else:
+        vacio = pd.DataFrame({c: pd.Series(dtype="object") for c in COLUMNAS_USADAS})
+        df_model = _limpiar_compacto(vacio) if compacto else _limpiar(vacio)
+    _resumen_clases(df_model)
+    return df_model
+
+def _limpiar(df):
+    """Limpieza, conversión de tipos y variable RIESGO sin imprimir nada (reutilizable por bloque)."""
+    df_model = df[COLUMNAS_USADAS].copy()
 
     # Limpieza y conversión
     df_model = df_model.dropna(subset=["SIT_FIN", "PROM_GRAL", "ASISTENCIA"])
@@ -37,6 +107,62 @@ def preparar_dataset(df):
     df_model["RIESGO"] = df_model["SIT_FIN"].map({"P": 0, "R": 1, "Y": 1})
     df_model = df_model.dropna()
 
+    # Tras el dropna los enteros vuelven a ser enteros aunque se hayan leído como float
+    for c in ["AGNO", "GEN_ALU", "RIESGO"]:
+        df_model[c] = df_model[c].astype("int64")
+    return df_model
+
+def _limpiar_compacto(df):
+    """
+    Igual que _limpiar, pero con dtypes compactos. Todos los filtros se combinan
+    en una sola máscara y cada columna se copia una única vez al tipo final.
+    """
+    sit_fin = df["SIT_FIN"]
+    numericas = {c: pd.to_numeric(df[c], errors="coerce") for c in ["PROM_GRAL", "ASISTENCIA", "EDAD_ALU"]}
+    mascara = sit_fin.isin(["P", "R", "Y"]) & df["AGNO"].notna() & df["GEN_ALU"].notna()
+    for serie in numericas.values():
+        mascara &= serie.notna()
+
+    sit_fin = sit_fin[mascara]
+    df_model = pd.DataFrame({
+        "AGNO": df["AGNO"][mascara],
+        "SIT_FIN": sit_fin,
+        "PROM_GRAL": numericas["PROM_GRAL"][mascara],
+        "ASISTENCIA": numericas["ASISTENCIA"][mascara],
+        "GEN_ALU": df["GEN_ALU"][mascara],
+        "EDAD_ALU": numericas["EDAD_ALU"][mascara],
+        "RIESGO": sit_fin.ne("P"),
+    })
+    return df_model.astype(DTYPES_COMPACTOS, copy=False)
+
+def reporte_memoria(df):
+    """Memoria por columna (bytes reales, incluyendo strings) y total en MB."""
+    uso = df.memory_usage(deep=True, index=False)
+    reporte = pd.DataFrame({
+        "dtype": df.dtypes.astype(str),
+        "bytes": uso,
+        "MB": (uso / 1024**2).round(3),
+    })
+    reporte.loc["TOTAL"] = ["", int(uso.sum()), round(uso.sum() / 1024**2, 3)]
+    return reporte
+
+def _resumen_clases(df_model):
     print("📊 Distribución de clases RIESGO (0=Promovido, 1=Riesgo):")
     print(df_model["RIESGO"].value_counts(normalize=True).round(3) * 100)
+
+def preparar_dataset(df, compacto=False):
+    """
+    Filtra columnas necesarias, convierte tipos, crea variable RIESGO y devuelve df_model listo para ML.
+    Con compacto=True usa DTYPES_COMPACTOS y retorna (df_model, reporte_memoria).
+    """
+    if compacto:
+        df_model = _limpiar_compacto(df)
+        _resumen_clases(df_model)
+        reporte = reporte_memoria(df_model)
+        print("💾 Memoria por columna (modo compacto):")
+        print(reporte)
+        return df_model, reporte
+
+    df_model = _limpiar(df)
+    _resumen_clases(df_model)
     return df_model
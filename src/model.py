@@ -1,16 +1,42 @@
 """
-model.py - Entrenamiento del modelo Logistic Regression (Motor de Riesgo)
+model.py - Entrenamiento del modelo Logistic Regression / XGBoost (Motor de Riesgo)
 Parte del proyecto Hackathon Duoc UC 2025
 """
 
-from sklearn.linear_model import LogisticRegression
+from sklearn.linear_model import LogisticRegression, SGDClassifier
 from sklearn.preprocessing import StandardScaler
 from sklearn.pipeline import Pipeline
 from sklearn.model_selection import train_test_split
 import pandas as pd
+import time
+import os
+
+FEATURES = ["PROM_GRAL", "ASISTENCIA", "GEN_ALU", "EDAD_ALU"]
+
+MOTORES = ("logistic", "xgboost")
+
+# XGBoost: histogramas, todos los núcleos (n_jobs=-1)
+XGB_PARAMS = {
+    "tree_method": "hist",
+    "n_jobs": -1,
+    "max_depth": 6,
+    "learning_rate": 0.1,
+    "max_bin": 256,
+    "eval_metric": "logloss",
+    "random_state": 42,
+}
+XGB_RONDAS = 500
+XGB_PARADA_TEMPRANA = 20
 
 def split_temporal(df_model):
-    """Realiza validación temporal o split 80/20 si solo hay datos 2024."""
+    """
+    Realiza validación temporal o split 80/20 si solo hay datos 2024.
+    También acepta la ruta de un dataset particionado por AGNO (src/dataset.py):
+    en ese caso solo se leen las particiones y columnas necesarias.
+    """
+    if isinstance(df_model, (str, os.PathLike)):
+        return _split_temporal_dataset(df_model)
+
     if "AGNO" not in df_model.columns:
         raise ValueError("El dataset no contiene la columna AGNO")
 
@@ -21,20 +47,265 @@ def split_temporal(df_model):
         train = df_model[df_model["AGNO"] < df_model["AGNO"].max()]
         test = df_model[df_model["AGNO"] == df_model["AGNO"].max()]
 
-    X_train = train[["PROM_GRAL", "ASISTENCIA", "GEN_ALU", "EDAD_ALU"]]
+    return _separar_xy(train, test)
+
+def _split_temporal_dataset(ruta):
+    """split_temporal sobre el dataset particionado, con filtros empujados a las particiones."""
+    import pyarrow.dataset as ds
+    from src.dataset import abrir_dataset, anios_disponibles, leer_dataset
+
+    dataset = abrir_dataset(ruta)
+    anios = anios_disponibles(dataset)
+    if not anios:
+        raise ValueError("El dataset no contiene particiones AGNO")
+
+    columnas = FEATURES + ["RIESGO"]
+    if len(anios) == 1:
+        print("⚠️ Solo existe un año, aplicando 80/20 aleatorio.")
+        train, test = train_test_split(leer_dataset(dataset, columnas), test_size=0.2, random_state=42)
+    else:
+        train = leer_dataset(dataset, columnas, ds.field("AGNO") < anios[-1])
+        test = leer_dataset(dataset, columnas, ds.field("AGNO") == anios[-1])
+    return _separar_xy(train, test)
+
+def _separar_xy(train, test):
+    X_train = train[FEATURES]
     y_train = train["RIESGO"]
-    X_test = test[["PROM_GRAL", "ASISTENCIA", "GEN_ALU", "EDAD_ALU"]]
+    X_test = test[FEATURES]
     y_test = test["RIESGO"]
 
     print(f"📊 Train: {X_train.shape[0]} | Test: {X_test.shape[0]}")
     return X_train, X_test, y_train, y_test
 
-def entrenar_modelo(X_train, y_train):
-    """Crea y entrena el pipeline base (scaler + logistic regression)."""
-    pipeline = Pipeline([
-        ("scaler", StandardScaler()),
-        ("model", LogisticRegression(max_iter=1000, random_state=42))
-    ])
-    pipeline.fit(X_train, y_train)
-    print("✅ Modelo entrenado correctamente.")
+def entrenar_modelo(X_train, y_train, motor="logistic", X_eval=None, y_eval=None, n_jobs=None):
+    """
+    Crea y entrena el modelo del motor indicado:
+    - "logistic": pipeline base (scaler + logistic regression).
+    - "xgboost": XGBClassifier hist multihilo; con X_eval/y_eval (el año de test)
+      se usa early stopping sobre ese conjunto. n_jobs reemplaza el de XGB_PARAMS
+      (todos los núcleos): en un pool de procesos, núcleos / workers.
+    """
+    if motor not in MOTORES:
+        raise ValueError(f"Motor desconocido: {motor} (opciones: {', '.join(MOTORES)})")
+
+    inicio = time.perf_counter()
+    if motor == "xgboost":
+        modelo = _entrenar_xgboost(X_train, y_train, X_eval, y_eval, n_jobs=n_jobs)
+    else:
+        modelo = Pipeline([
+            ("scaler", StandardScaler()),
+            ("model", LogisticRegression(max_iter=1000, random_state=42))
+        ])
+        modelo.fit(X_train, y_train)
+    print(f"✅ Modelo entrenado correctamente ({motor}, {time.perf_counter() - inicio:.1f}s).")
+    return modelo
+
+def _parametros_xgboost(nativo=False, **extra):
+    """XGB_PARAMS + extra; nativo=True traduce los nombres de la API sklearn a los de xgb.train."""
+    params = dict(XGB_PARAMS)
+    params.update(extra)
+    if nativo:
+        n_jobs = params.pop("n_jobs")
+        params["nthread"] = os.cpu_count() if n_jobs == -1 else n_jobs
+        params["seed"] = params.pop("random_state")
+    return params
+
+def _entrenar_xgboost(X_train, y_train, X_eval=None, y_eval=None, n_jobs=None):
+    import xgboost as xgb
+
+    con_eval = X_eval is not None and y_eval is not None
+    modelo = xgb.XGBClassifier(
+        n_estimators=XGB_RONDAS,
+        early_stopping_rounds=XGB_PARADA_TEMPRANA if con_eval else None,
+        **_parametros_xgboost(**({"n_jobs": n_jobs} if n_jobs else {})),
+    )
+    modelo.fit(X_train, y_train, eval_set=[(X_eval, y_eval)] if con_eval else None, verbose=False)
+    if con_eval:
+        print(f"🌲 XGBoost: mejor iteración {modelo.best_iteration} (early stopping en el año de test)")
+    return modelo
+
+def comparar_motores(X_train, y_train, X_test, y_test):
+    """Entrena ambos motores sobre el mismo split e imprime tiempo de entrenamiento y AUC."""
+    from sklearn.metrics import roc_auc_score
+
+    filas = []
+    for motor in MOTORES:
+        inicio = time.perf_counter()
+        modelo = entrenar_modelo(X_train, y_train, motor=motor, X_eval=X_test, y_eval=y_test)
+        segundos = time.perf_counter() - inicio
+        auc = roc_auc_score(y_test, modelo.predict_proba(X_test)[:, 1])
+        filas.append({"motor": motor, "entrenamiento_s": round(segundos, 2), "auc_test": round(auc, 4)})
+    tabla = pd.DataFrame(filas).set_index("motor")
+    print(tabla)
+    return tabla
+
+def _bloques(fuente, chunksize, anios=None):
+    """
+    Bloques preparados desde una ruta CSV (iterar_csv) o desde una función que los genera.
+    Con anios, solo las filas con AGNO en anios (los bloques vacíos se omiten).
+    """
+    if callable(fuente):
+        bloques = fuente()
+    else:
+        from src.load import iterar_csv
+        bloques = iterar_csv(fuente, chunksize=chunksize, compacto=True)
+
+    for bloque in bloques:
+        if anios is not None:
+            bloque = bloque[bloque["AGNO"].isin(list(anios))]
+        if len(bloque):
+            yield bloque
+
+def _iterador_xgboost(fuente, anios, chunksize, cache_dir):
+    """DataIter de XGBoost sobre los bloques: el dataset nunca se materializa completo."""
+    import xgboost as xgb
+
+    os.makedirs(cache_dir, exist_ok=True)
+
+    class IteradorBloques(xgb.DataIter):
+        def __init__(self):
+            self._bloques = None
+            super().__init__(cache_prefix=os.path.join(cache_dir, "xgb"))
+
+        def next(self, input_data):
+            if self._bloques is None:
+                self._bloques = _bloques(fuente, chunksize, anios)
+            bloque = next(self._bloques, None)
+            if bloque is None:
+                return False
+            input_data(data=bloque[FEATURES], label=bloque["RIESGO"])
+            return True
+
+        def reset(self):
+            self._bloques = None
+
+    return IteradorBloques()
+
+def entrenar_xgboost_externo(fuente, anios_train, anio_test=None, chunksize=500_000,
+                             cache_dir="data/cache/xgb"):
+    """
+    Entrena el motor XGBoost en modo memoria externa: los bloques de fuente (ruta CSV
+    o función, como en entrenar_incremental) se cuantizan y se paginan a cache_dir.
+    Con anio_test, ese año se usa para early stopping. Retorna un XGBClassifier.
+    """
+    import xgboost as xgb
+
+    inicio = time.perf_counter()
+    # ExtMemQuantileDMatrix (XGBoost >= 3) es el formato recomendado para hist
+    MatrizExterna = getattr(xgb, "ExtMemQuantileDMatrix", None)
+    it_train = _iterador_xgboost(fuente, anios_train, chunksize, cache_dir)
+    dtrain = MatrizExterna(it_train) if MatrizExterna else xgb.DMatrix(it_train)
+
+    evals = []
+    if anio_test is not None:
+        it_test = _iterador_xgboost(fuente, [anio_test], chunksize, os.path.join(cache_dir, "test"))
+        dtest = MatrizExterna(it_test, ref=dtrain) if MatrizExterna else xgb.DMatrix(it_test)
+        evals = [(dtest, "test")]
+
+    booster = xgb.train(
+        _parametros_xgboost(nativo=True, objective="binary:logistic"),
+        dtrain,
+        num_boost_round=XGB_RONDAS,
+        evals=evals,
+        early_stopping_rounds=XGB_PARADA_TEMPRANA if evals else None,
+        verbose_eval=False,
+    )
+    print(f"✅ XGBoost (memoria externa) entrenado en {time.perf_counter() - inicio:.1f}s"
+          + (f", mejor iteración {booster.best_iteration}" if evals else ""))
+
+    # Mismo tipo que entrena entrenar_modelo (predict_proba, guardado, evaluación)
+    modelo = xgb.XGBClassifier()
+    modelo.load_model(bytearray(booster.save_raw("json")))
+    return modelo
+
+def entrenar_incremental(fuente, pipeline=None, anios=None, chunksize=500_000, random_state=42):
+    """
+    Entrena (o sigue entrenando) scaler + SGDClassifier(log_loss) bloque a bloque,
+    sin cargar el dataset completo en memoria.
+
+    fuente: ruta a un CSV (se lee con iterar_csv) o función sin argumentos que retorna
+            un iterable de DataFrames ya preparados (FEATURES + RIESGO, y AGNO si se filtra).
+    anios: si se indica, solo se usan las filas con AGNO en anios.
+    pipeline: modelo incremental previo; sus estadísticas y coeficientes se actualizan
+              con los datos nuevos sin volver a leer los años anteriores.
+
+    Se hacen dos pasadas sobre la fuente: la primera actualiza media/varianza del
+    scaler y la segunda ajusta el modelo con los datos ya escalados con esas estadísticas.
+    Al actualizar un modelo previo, sus coeficientes se re-expresan en la nueva escala
+    antes de entrenar (ver _reescalar_coeficientes): cambiar el scaler no cambia sus
+    predicciones, solo lo hacen los datos nuevos.
+    """
+    if pipeline is None:
+        pipeline = Pipeline([
+            ("scaler", StandardScaler()),
+            ("model", SGDClassifier(loss="log_loss", random_state=random_state))
+        ])
+    scaler = pipeline.named_steps["scaler"]
+    modelo = pipeline.named_steps["model"]
+
+    previo = (scaler.mean_.copy(), scaler.scale_.copy()) if hasattr(modelo, "coef_") else None
+    for bloque in _bloques(fuente, chunksize, anios):
+        scaler.partial_fit(bloque[FEATURES])
+    if previo is not None:
+        _reescalar_coeficientes(modelo, *previo, scaler.mean_, scaler.scale_)
+
+    filas = 0
+    for i, bloque in enumerate(_bloques(fuente, chunksize, anios)):
+        # Mezcla dentro del bloque: el CSV suele venir ordenado por establecimiento
+        bloque = bloque.sample(frac=1.0, random_state=random_state + i)
+        modelo.partial_fit(scaler.transform(bloque[FEATURES]), bloque["RIESGO"].astype("int64"), classes=[0, 1])
+        filas += len(bloque)
+
+    if filas == 0:
+        raise ValueError("No hay filas para entrenar con los años indicados")
+    print(f"✅ Modelo incremental actualizado con {filas} filas (total visto: {int(scaler.n_samples_seen_)}).")
     return pipeline
+
+def _reescalar_coeficientes(modelo, media, escala, media_nueva, escala_nueva):
+    """
+    Ajusta coef_/intercept_ para que w·(x-μ)/σ + b == w'·(x-μ')/σ' + b':
+    w' = w·σ'/σ y b' = b + Σ w·(μ'-μ)/σ.
+    """
+    # Se conserva el dtype: con bloques compactos (float32) SGD espera coeficientes float32
+    w = modelo.coef_
+    modelo.intercept_ = (modelo.intercept_ + w @ ((media_nueva - media) / escala)).astype(modelo.intercept_.dtype)
+    modelo.coef_ = (w * (escala_nueva / escala)).astype(w.dtype)
+
+def actualizar_modelo(pipeline, fuente, anio, chunksize=500_000):
+    """Incorpora los datos de un año nuevo a un modelo entrenado con entrenar_incremental."""
+    return entrenar_incremental(fuente, pipeline=pipeline, anios=[anio], chunksize=chunksize)
+
+def exportar_scorer(pipeline, ruta="src/coach/modelo_riesgo.json", features=None):
+    """
+    Exporta el pipeline a un scorer JSON versionado (solo NumPy) que usa modelo_riesgo.
+    El scaler queda plegado dentro de los coeficientes. Falla si las features del
+    pipeline no son las que modelo_riesgo sabe construir.
+    """
+    from datetime import datetime, timezone
+    import sklearn
+    from src.coach.scorer import ScorerLineal, features_de, validar_features
+
+    features = validar_features(features if features is not None else features_de(pipeline))
+    scorer = ScorerLineal.desde_pipeline(
+        pipeline,
+        features=features,
+        metadata={
+            "creado": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "sklearn": sklearn.__version__,
+        },
+    )
+    scorer.guardar(ruta)
+    print(f"💾 Scorer exportado en {ruta}")
+    return scorer
+
+def exportar_xgboost(modelo, ruta="src/coach/modelo_riesgo_xgb.json"):
+    """
+    Guarda el motor XGBoost en su formato nativo (JSON) para modelo_riesgo. Los nombres
+    de las features quedan en el modelo; falla si modelo_riesgo no sabe construirlas.
+    """
+    from src.coach.scorer import features_de, validar_features
+
+    validar_features(features_de(modelo))
+    modelo.save_model(ruta)
+    print(f"💾 Modelo XGBoost exportado en {ruta}")
+    return ruta
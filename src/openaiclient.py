@@ -1,14 +1,111 @@
-from openai import OpenAI
+"""
+openaiclient.py - Cliente OpenAI compartido por todo el proyecto.
+
+get_client() crea un único cliente por proceso (por configuración) sobre un httpx.Client
+con keep-alive: las llamadas del coach, del extractor y de este módulo reutilizan la
+misma conexión TLS en vez de abrir una nueva en cada plan. get_async_client() es el
+equivalente async (uno por event loop).
+
+Configuración por variables de entorno (.env):
+- OPENAI_API_KEY, OPENAI_BASE_URL
+- OPENAI_TIMEOUT (s, total), OPENAI_CONNECT_TIMEOUT (s)
+- OPENAI_MAX_CONNECTIONS, OPENAI_MAX_KEEPALIVE, OPENAI_KEEPALIVE_EXPIRY (s)
+- OPENAI_MAX_RETRIES
+"""
+
+import os
+import asyncio
+import threading
+import time
+import weakref
+from functools import lru_cache
+from typing import Optional
+
+import httpx
+from openai import AsyncOpenAI, OpenAI
+from dotenv import load_dotenv
+
+load_dotenv()
+
+_LOCK = threading.Lock()
+
+
+def _env_float(nombre: str, defecto: float) -> float:
+    return float(os.getenv(nombre, defecto))
+
+
+def _env_int(nombre: str, defecto: int) -> int:
+    return int(os.getenv(nombre, defecto))
+
+
+def http_limits() -> httpx.Limits:
+    """Tamaño del pool de conexiones y tiempo de vida de las conexiones ociosas."""
+    return httpx.Limits(
+        max_connections=_env_int("OPENAI_MAX_CONNECTIONS", 20),
+        max_keepalive_connections=_env_int("OPENAI_MAX_KEEPALIVE", 10),
+        keepalive_expiry=_env_float("OPENAI_KEEPALIVE_EXPIRY", 60.0),
+    )
+
+
+def http_timeout() -> httpx.Timeout:
+    """Timeout total por request y timeout explícito de conexión."""
+    return httpx.Timeout(
+        _env_float("OPENAI_TIMEOUT", 60.0),
+        connect=_env_float("OPENAI_CONNECT_TIMEOUT", 5.0),
+    )
+
+
+@lru_cache(maxsize=None)
+def _crear_client(api_key: Optional[str], base_url: Optional[str]) -> OpenAI:
+    return OpenAI(
+        api_key=api_key,
+        base_url=base_url,
+        timeout=http_timeout(),
+        max_retries=_env_int("OPENAI_MAX_RETRIES", 2),
+        http_client=httpx.Client(limits=http_limits(), timeout=http_timeout()),
+    )
+
+
+def get_client(api_key: Optional[str] = None, base_url: Optional[str] = None) -> OpenAI:
+    """
+    Devuelve el cliente OpenAI compartido del proceso (se crea en la primera llamada).
+    Sin argumentos usa OPENAI_API_KEY / OPENAI_BASE_URL del entorno.
+    """
+    api_key = api_key or os.getenv("OPENAI_API_KEY")
+    base_url = base_url or os.getenv("OPENAI_BASE_URL")
+    with _LOCK:
+        return _crear_client(api_key, base_url)
+
+
+# Los clientes async quedan atados a su event loop: uno por loop y configuración
+_ASYNC_CLIENTS: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def get_async_client(api_key: Optional[str] = None, base_url: Optional[str] = None) -> AsyncOpenAI:
+    """Versión async de get_client(): un AsyncOpenAI con pool keep-alive por event loop."""
+    api_key = api_key or os.getenv("OPENAI_API_KEY")
+    base_url = base_url or os.getenv("OPENAI_BASE_URL")
+    loop = asyncio.get_running_loop()
+    with _LOCK:
+        por_loop = _ASYNC_CLIENTS.setdefault(loop, {})
+        clave = (api_key, base_url)
+        if clave not in por_loop:
+            por_loop[clave] = AsyncOpenAI(
+                api_key=api_key,
+                base_url=base_url,
+                timeout=http_timeout(),
+                max_retries=_env_int("OPENAI_MAX_RETRIES", 2),
+                http_client=httpx.AsyncClient(limits=http_limits(), timeout=http_timeout()),
+            )
+        return por_loop[clave]
 
-#Reemplaza con tu clave de API de OpenAI
-client = OpenAI(api_key="YOUR_API_KEY")
 
 def generar_respuesta(prompt):
     """
     Envía un prompt al modelo de OpenAI y devuelve la respuesta generada.
     """
-    response = client.chat.completions.create(
-        model="gpt-4o-mini", 
+    response = get_client().chat.completions.create(
+        model="gpt-4o-mini",
         messages=[
             {"role": "system", "content": "Eres un asistente educativo experto en análisis de riesgo de deserción."},
             {"role": "user", "content": prompt}
@@ -19,7 +116,46 @@ def generar_respuesta(prompt):
 
     return response.choices[0].message.content.strip()
 
+
+def medir_ahorro_conexion(n: int = 5, url: Optional[str] = None) -> dict:
+    """
+    Compara la latencia por request abriendo una conexión nueva cada vez (como antes,
+    un cliente por plan) versus reutilizando el pool keep-alive. La diferencia es el
+    costo de DNS + TCP + TLS que se ahorra por request. No requiere API key válida:
+    basta con la respuesta HTTP del endpoint /models.
+    """
+    url = url or (os.getenv("OPENAI_BASE_URL") or "https://api.openai.com/v1").rstrip("/") + "/models"
+
+    def ms(fn):
+        t0 = time.perf_counter()
+        fn()
+        return (time.perf_counter() - t0) * 1000
+
+    nuevas = []
+    for _ in range(n):
+        def sin_pool():
+            with httpx.Client(timeout=http_timeout()) as c:
+                c.get(url)
+        nuevas.append(ms(sin_pool))
+
+    with httpx.Client(limits=http_limits(), timeout=http_timeout()) as pool:
+        pool.get(url)  # primera conexión (se paga una sola vez)
+        reutilizadas = [ms(lambda: pool.get(url)) for _ in range(n)]
+
+    resultado = {
+        "ms_conexion_nueva": sum(nuevas) / n,
+        "ms_pool_keepalive": sum(reutilizadas) / n,
+    }
+    resultado["ms_ahorrados_por_request"] = resultado["ms_conexion_nueva"] - resultado["ms_pool_keepalive"]
+    return resultado
+
+
 # Ejemplo de uso
 if __name__ == "__main__":
-    pregunta = "Explica cómo la IA puede ayudar a reducir la deserción estudiantil."
-    print(generar_respuesta(pregunta))
+    import sys
+
+    if "--medir" in sys.argv:
+        print(medir_ahorro_conexion())
+    else:
+        pregunta = "Explica cómo la IA puede ayudar a reducir la deserción estudiantil."
+        print(generar_respuesta(pregunta))
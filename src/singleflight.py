@@ -0,0 +1,97 @@
+"""
+singleflight.py - Coalescencia de llamadas idénticas en curso ("single-flight").
+
+Si llegan varias solicitudes con la misma clave mientras la primera aún se está
+ejecutando (doble clic en "Generar plan", varios orientadores abriendo al mismo
+alumno), solo la primera ejecuta la función; las demás esperan y reciben el mismo
+resultado (o la misma excepción). Al terminar, la clave se libera.
+
+SingleFlight sirve para hilos (Streamlit atiende cada sesión en un hilo) y
+AsyncSingleFlight para corrutinas dentro de un event loop. La coalescencia es
+por proceso. SingleFlight.unirse/terminar permiten que el líder produzca el
+resultado de a poco (streaming) mientras los demás esperan el valor final.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._en_vuelo: Dict[str, Future] = {}
+        self.ejecutadas = 0
+        self.compartidas = 0
+
+    def unirse(self, clave: str) -> Tuple[Future, bool]:
+        """
+        Registra una solicitud para clave. Retorna (futuro, lider): el líder debe
+        ejecutar y llamar a terminar(); los demás esperan futuro.result().
+        """
+        with self._lock:
+            futuro = self._en_vuelo.get(clave)
+            if futuro is None:
+                futuro = Future()
+                self._en_vuelo[clave] = futuro
+                self.ejecutadas += 1
+                return futuro, True
+            self.compartidas += 1
+            return futuro, False
+
+    def terminar(self, clave: str, futuro: Future, resultado: Any = None,
+                 error: Optional[BaseException] = None) -> None:
+        """Entrega el resultado (o la excepción) a quienes esperan y libera la clave."""
+        with self._lock:
+            if self._en_vuelo.get(clave) is futuro:
+                del self._en_vuelo[clave]
+        if error is not None:
+            futuro.set_exception(error)
+        else:
+            futuro.set_result(resultado)
+
+    def do(self, clave: str, fn: Callable[[], Any]) -> Any:
+        futuro, lider = self.unirse(clave)
+        if not lider:
+            return futuro.result()
+
+        try:
+            resultado = fn()
+        except BaseException as e:
+            self.terminar(clave, futuro, error=e)
+            raise
+        self.terminar(clave, futuro, resultado)
+        return resultado
+
+    def stats(self) -> dict:
+        return {"ejecutadas": self.ejecutadas, "compartidas": self.compartidas}
+
+
+class AsyncSingleFlight:
+    def __init__(self):
+        self._en_vuelo: Dict[str, asyncio.Future] = {}
+        self.ejecutadas = 0
+        self.compartidas = 0
+
+    async def do(self, clave: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        futuro = self._en_vuelo.get(clave)
+        if futuro is not None and futuro.get_loop() is asyncio.get_running_loop():
+            self.compartidas += 1
+            # shield: si un seguidor se cancela, no se cancela la generación compartida
+            return await asyncio.shield(futuro)
+
+        futuro = asyncio.ensure_future(fn())
+        self._en_vuelo[clave] = futuro
+        self.ejecutadas += 1
+        try:
+            return await asyncio.shield(futuro)
+        finally:
+            if futuro.done() and self._en_vuelo.get(clave) is futuro:
+                del self._en_vuelo[clave]
+            elif not futuro.done():
+                futuro.add_done_callback(lambda f: self._en_vuelo.pop(clave, None)
+                                         if self._en_vuelo.get(clave) is f else None)
+
+    def stats(self) -> dict:
+        return {"ejecutadas": self.ejecutadas, "compartidas": self.compartidas}
@@ -1,9 +1,28 @@
 """
 utils.py - Funciones auxiliares
 """
+import os
+import numpy as np
 import pandas as pd
 
 def resumen_dataframe(df: pd.DataFrame):
     print(f"📋 Filas: {df.shape[0]} | Columnas: {df.shape[1]}")
     print(f"Nulos totales: {df.isna().sum().sum()}")
     return df.describe()
+
+def compartir_arrays(arrays: dict, carpeta: str) -> dict:
+    """
+    Guarda arreglos NumPy como .npy en carpeta para que procesos hijos los abran con
+    abrir_arrays (memory-map) en vez de recibir una copia serializada cada uno.
+    Retorna {nombre: ruta}.
+    """
+    os.makedirs(carpeta, exist_ok=True)
+    rutas = {}
+    for nombre, arreglo in arrays.items():
+        rutas[nombre] = os.path.join(carpeta, f"{nombre}.npy")
+        np.save(rutas[nombre], np.ascontiguousarray(arreglo))
+    return rutas
+
+def abrir_arrays(rutas: dict) -> dict:
+    """Abre (solo lectura, memory-map) los arreglos guardados por compartir_arrays."""
+    return {nombre: np.load(ruta, mmap_mode="r") for nombre, ruta in rutas.items()}
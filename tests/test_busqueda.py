@@ -0,0 +1,24 @@
+"""
+test_busqueda.py - Selección del modelo tras successive halving
+Parte del proyecto Hackathon Duoc UC 2025
+"""
+
+import pandas as pd
+
+from src.busqueda import elegir_modelo
+
+
+def _fila(candidato, ronda, n_filas, recall, auc, predict_ms_1k):
+    return {"candidato": candidato, "params": {"motor": "logistic"}, "ronda": ronda, "n_filas": n_filas,
+            "recall": recall, "auc": auc, "predict_ms_1k": predict_ms_1k}
+
+
+def test_descartado_en_ronda_temprana_no_se_elige():
+    leaderboard = pd.DataFrame([
+        # "barato" se ve mejor con la submuestra de la ronda 0, pero no pasó a la ronda 1
+        _fila("barato", 0, 1_000, 0.95, 0.90, 0.01),
+        _fila("sobreviviente", 0, 1_000, 0.80, 0.85, 0.50),
+        _fila("sobreviviente", 1, 9_000, 0.75, 0.80, 0.50),
+    ])
+    assert elegir_modelo(leaderboard, 0.7)["candidato"] == "sobreviviente"
+    assert elegir_modelo(leaderboard, 0.8) is None
@@ -0,0 +1,23 @@
+"""
+test_extractor_hibrido.py - Valores del LLM en el extractor híbrido
+Parte del proyecto Hackathon Duoc UC 2025
+"""
+
+import pytest
+
+from src.extractor import extractor_hibrido
+
+
+@pytest.mark.parametrize("respuesta, edad, genero", [
+    ('{"EDAD_ALU": "15", "GEN_ALU": "2"}', 15.0, 2),
+    ('{"EDAD_ALU": "quince", "GEN_ALU": 3}', None, None),
+    ('{"EDAD_ALU": true, "GEN_ALU": 1.0}', None, 1),
+])
+def test_valores_del_llm_se_normalizan(monkeypatch, respuesta, edad, genero):
+    monkeypatch.setattr(extractor_hibrido, "get_client", lambda: None)
+    monkeypatch.setattr(extractor_hibrido, "completar", lambda *a, **k: respuesta)
+
+    data = extractor_hibrido.parse_nl_to_json_hibrido("asistencia del 90%, promedio 5.5", usar_cache=False)
+
+    assert data["EDAD_ALU"] == edad and data["GEN_ALU"] == genero
+    assert data["_errores"] == []
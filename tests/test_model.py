@@ -0,0 +1,53 @@
+"""
+test_model.py - Entrenamiento incremental (src.model)
+Parte del proyecto Hackathon Duoc UC 2025
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.model import FEATURES, entrenar_incremental, actualizar_modelo, _reescalar_coeficientes
+
+
+def _anio(n, anio, corrimiento, rng):
+    df = pd.DataFrame({
+        "PROM_GRAL": rng.uniform(1, 7, n) + corrimiento,
+        "ASISTENCIA": rng.uniform(50, 100, n) - 10 * corrimiento,
+        "GEN_ALU": rng.integers(1, 3, n),
+        "EDAD_ALU": rng.integers(6, 20, n) + corrimiento,
+        "AGNO": anio,
+    })
+    df["RIESGO"] = (rng.random(n) < 1 / (1 + np.exp(-(3 - 0.6 * df["PROM_GRAL"])))).astype(int)
+    return df
+
+
+def test_actualizar_scaler_no_cambia_predicciones():
+    rng = np.random.default_rng(0)
+    nuevo = _anio(5000, 2021, 1.5, rng)
+    pipeline = entrenar_incremental(lambda: iter([_anio(5000, 2020, 0.0, rng)]))
+    scaler, modelo = pipeline.named_steps["scaler"], pipeline.named_steps["model"]
+    antes = pipeline.predict_proba(nuevo[FEATURES])[:, 1]
+
+    # Lo que hace la primera pasada de una actualización con un año de otra distribución
+    previo = (scaler.mean_.copy(), scaler.scale_.copy())
+    scaler.partial_fit(nuevo[FEATURES])
+    _reescalar_coeficientes(modelo, *previo, scaler.mean_, scaler.scale_)
+
+    np.testing.assert_allclose(pipeline.predict_proba(nuevo[FEATURES])[:, 1], antes, atol=1e-12)
+
+
+def test_actualizar_modelo_con_bloques_compactos(tmp_path):
+    rng = np.random.default_rng(1)
+    df = pd.concat([_anio(3000, 2020, 0.0, rng), _anio(3000, 2021, 0.5, rng)])
+    df["SIT_FIN"] = np.where(df["RIESGO"] == 1, "R", "P")
+    df["EDAD_ALU"] = df["EDAD_ALU"].round().astype(int)
+    ruta = tmp_path / "rendimiento.csv"
+    df[["AGNO", "SIT_FIN", "PROM_GRAL", "ASISTENCIA", "GEN_ALU", "EDAD_ALU"]].to_csv(ruta, sep=";", index=False)
+
+    pipeline = entrenar_incremental(str(ruta), anios=[2020], chunksize=1000)
+    modelo = pipeline.named_steps["model"]
+    dtypes = (modelo.coef_.dtype, modelo.intercept_.dtype)
+    actualizar_modelo(pipeline, str(ruta), 2021, chunksize=1000)
+
+    assert (modelo.coef_.dtype, modelo.intercept_.dtype) == dtypes
+    assert int(pipeline.named_steps["scaler"].n_samples_seen_) == 6000
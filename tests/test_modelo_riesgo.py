@@ -0,0 +1,113 @@
+"""
+test_modelo_riesgo.py - Modelos entrenados con src.model servidos por modelo_riesgo
+Parte del proyecto Hackathon Duoc UC 2025
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.model import FEATURES, entrenar_modelo, exportar_scorer, exportar_xgboost
+from src.coach import modelo_riesgo
+from src.coach.scorer import ScorerLineal
+
+
+def _datos(n=4000, seed=0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame({
+        "PROM_GRAL": rng.uniform(1.0, 7.0, n).round(1),
+        "ASISTENCIA": rng.integers(50, 101, n).astype(float),
+        "GEN_ALU": rng.integers(1, 3, n),
+        "EDAD_ALU": rng.integers(6, 20, n),
+    })[FEATURES]
+    z = 4.0 - 0.6 * X["PROM_GRAL"] - 0.03 * X["ASISTENCIA"] + 0.3 * X["GEN_ALU"]
+    y = (rng.random(n) < 1 / (1 + np.exp(-z))).astype(int)
+    return X, y
+
+
+@pytest.fixture
+def sin_modelo(monkeypatch):
+    """Aísla el estado global de modelo_riesgo (se restaura al terminar el test)."""
+    for nombre in ("modelo_ml", "modelo_origen", "FEATURES", "grilla"):
+        monkeypatch.setattr(modelo_riesgo, nombre, getattr(modelo_riesgo, nombre))
+
+
+def _alumnos():
+    return pd.DataFrame({
+        "asistencia": [85, 70, 95, 88],
+        "promedio": [5.0, 3.9, 6.4, 5.25],
+        "edad": [14, 17, 9, 12],
+        "genero": [2, 1, 2, 1],
+    })
+
+
+def _esperado(modelo, alumnos):
+    X = pd.DataFrame({
+        "PROM_GRAL": alumnos["promedio"], "ASISTENCIA": alumnos["asistencia"],
+        "GEN_ALU": alumnos["genero"], "EDAD_ALU": alumnos["edad"],
+    })[FEATURES]
+    return modelo.predict_proba(X)[:, 1]
+
+
+def test_scorer_exportado_predice_como_el_pipeline(tmp_path, sin_modelo):
+    X, y = _datos()
+    pipeline = entrenar_modelo(X, y)
+    ruta = str(tmp_path / "modelo_riesgo.json")
+    exportar_scorer(pipeline, ruta=ruta)
+    modelo_riesgo.activar_modelo(ScorerLineal.cargar(ruta), ruta)
+
+    alumnos = _alumnos()
+    esperado = _esperado(pipeline, alumnos)
+    _, prob = modelo_riesgo.predecir_riesgo(85, 5.0, 14, 2)
+    assert prob == round(float(esperado[0]), 2)
+
+    lote = modelo_riesgo.predecir_riesgo_lote(alumnos)
+    assert lote["probabilidad"].tolist() == [round(float(p), 2) for p in esperado]
+
+
+def test_exportar_scorer_rechaza_features_desconocidas(tmp_path):
+    X, y = _datos()
+    pipeline = entrenar_modelo(X.rename(columns={"GEN_ALU": "DEPENDENCIA"}), y)
+    with pytest.raises(ValueError):
+        exportar_scorer(pipeline, ruta=str(tmp_path / "modelo_riesgo.json"))
+
+
+def test_grilla_con_las_features_del_modelo(tmp_path, sin_modelo):
+    X, y = _datos()
+    pipeline = entrenar_modelo(X, y)
+    ruta = str(tmp_path / "modelo_riesgo.json")
+    exportar_scorer(pipeline, ruta=ruta)
+    modelo_riesgo.activar_modelo(ScorerLineal.cargar(ruta), ruta)
+    grilla = modelo_riesgo.construir_grilla(str(tmp_path / "grilla.npy"))
+
+    assert [e.nombre for e in grilla.ejes] == FEATURES
+    assert grilla.buscar_uno(PROM_GRAL=5.0, ASISTENCIA=85, GEN_ALU=2, EDAD_ALU=14) is not None
+    assert grilla.buscar_uno(PROM_GRAL=5.25, ASISTENCIA=85, GEN_ALU=2, EDAD_ALU=14) is None
+
+    # Filas en la grilla y fuera de ella (promedio 5.25) dan lo mismo que el pipeline
+    alumnos = _alumnos()
+    esperado = _esperado(pipeline, alumnos)
+    lote = modelo_riesgo.predecir_riesgo_lote(alumnos)
+    assert lote["probabilidad"].tolist() == [round(float(p), 2) for p in esperado]
+    _, prob = modelo_riesgo.predecir_riesgo(85, 5.0, 14, 2)
+    assert prob == round(float(esperado[0]), 2)
+
+
+def test_motor_xgboost_exportado(tmp_path, sin_modelo):
+    xgb = pytest.importorskip("xgboost")
+    X, y = _datos()
+    modelo = entrenar_modelo(X, y, motor="xgboost")
+    ruta = str(tmp_path / "modelo_riesgo_xgb.json")
+    exportar_xgboost(modelo, ruta=ruta)
+    cargado = xgb.XGBClassifier()
+    cargado.load_model(ruta)
+    modelo_riesgo.activar_modelo(cargado, ruta)
+    assert modelo_riesgo.FEATURES == FEATURES
+
+    alumnos = _alumnos()
+    esperado = [round(float(p), 2) for p in _esperado(modelo, alumnos)]
+    assert modelo_riesgo.predecir_riesgo_lote(alumnos)["probabilidad"].tolist() == esperado
+    assert modelo_riesgo.predecir_riesgo(85, 5.0, 14, 2)[1] == esperado[0]
+
+    modelo_riesgo.construir_grilla(str(tmp_path / "grilla.npy"))
+    assert modelo_riesgo.predecir_riesgo_lote(alumnos)["probabilidad"].tolist() == esperado
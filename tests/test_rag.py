@@ -0,0 +1,44 @@
+"""
+test_rag.py - Reconstrucción del índice del RAG con lectores activos
+Parte del proyecto Hackathon Duoc UC 2025
+"""
+
+import shutil
+
+import pytest
+
+from src.coach.rag import LocalRAG, get_rag
+
+
+def test_reconstruir_no_toca_el_indice_mapeado(tmp_path):
+    kb = tmp_path / "kb"
+    shutil.copytree("kb", kb, ignore=shutil.ignore_patterns(".index"))
+    get_rag(str(kb))
+    # Lector que abre el índice guardado (arreglos con memory-map)
+    viejo = LocalRAG(str(kb)).load_or_build()
+    antes = viejo.retrieve("asistencia baja", top_k=2)
+
+    # Cambios que agrandan y achican la KB: cada uno reconstruye el índice
+    with open(kb / "asistencia.md", "a", encoding="utf-8") as f:
+        f.write("\n\nInasistencias reiteradas y atrasos frecuentes.\n" * 20)
+    nuevo = get_rag(str(kb))
+    (kb / "asistencia.md").write_text("# Asistencia\nBreve.", encoding="utf-8")
+    ultimo = get_rag(str(kb))
+
+    assert ultimo is not nuevo
+    assert ultimo.build_dir != viejo.build_dir
+    assert viejo.retrieve("asistencia baja", top_k=2) == antes
+    assert nuevo.retrieve("atrasos", top_k=1)[0][0].title == "asistencia"
+
+
+def test_motores_distintos_comparten_el_indice(tmp_path):
+    pytest.importorskip("faiss")
+    kb = tmp_path / "kb"
+    shutil.copytree("kb", kb, ignore=shutil.ignore_patterns(".index"))
+
+    LocalRAG(str(kb), engine="bm25").load_or_build()
+    LocalRAG(str(kb), engine="faiss").load_or_build()
+
+    # Cada motor encuentra su índice guardado sin reconstruir
+    for engine in ("bm25", "faiss", "tfidf"):
+        assert LocalRAG(str(kb), engine=engine).load()